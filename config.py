@@ -2,34 +2,67 @@
 配置文件 - SecretGuard 密钥泄露监控系统
 """
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+from dotenv import dotenv_values
+
+
+@lru_cache(maxsize=1)
+def _load_env_once() -> Mapping[str, str]:
+    """
+    解析 .env 文件并合并进程环境变量（每个进程只解析一次）
+    
+    已存在的环境变量优先级高于 .env 中的值（与 load_dotenv 默认行为一致），
+    解析结果同时写回 os.environ，供仍使用 os.getenv 的模块读取。
+    
+    Returns:
+        只读的环境变量映射
+    """
+    for key, value in dotenv_values().items():
+        if value is not None:
+            os.environ.setdefault(key, value)
+    return MappingProxyType(dict(os.environ))
+
 
 # 加载环境变量
-load_dotenv()
+ENV = _load_env_once()
 
 # GitHub配置
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
+GITHUB_TOKEN = ENV.get('GITHUB_TOKEN', '')
 
 # 多Token支持（用逗号分隔）
-GITHUB_TOKENS = os.getenv('GITHUB_TOKENS', '').split(',') if os.getenv('GITHUB_TOKENS') else []
-# 合并单token和多tokens
-ALL_GITHUB_TOKENS = list(filter(None, [GITHUB_TOKEN] + GITHUB_TOKENS))
+GITHUB_TOKENS = tuple(t for t in (t.strip() for t in ENV.get('GITHUB_TOKENS', '').split(',')) if t)
+# 合并单token和多tokens（一次性去空、去重，保持顺序）
+ALL_GITHUB_TOKENS = tuple(dict.fromkeys(t for t in (GITHUB_TOKEN.strip(), *GITHUB_TOKENS) if t))
+# 多Token轮询的起始Token序号（从0开始）
+# 同一台机器上并行运行多个实例时，为每个实例分配不同的值，避免同时耗尽同一个Token
+GITHUB_TOKEN_START_INDEX = int(ENV.get('GITHUB_TOKEN_START_INDEX', 0))
+
+# Token配额状态缓存文件（进程退出时保存，下次启动时跳过尚未重置的Token）
+TOKEN_STATE_FILE = os.path.expanduser(ENV.get(
+    'TOKEN_STATE_FILE',
+    os.path.join('~', '.cache', 'secretguard', 'tokens.json')
+))
+
+# 日志级别（DEBUG/INFO/WARNING/ERROR），设为 WARNING 可关闭逐条检查的详细输出
+LOG_LEVEL = ENV.get('LOG_LEVEL', 'INFO').upper()
 
 # 扫描配置
-SCAN_INTERVAL_HOURS = int(os.getenv('SCAN_INTERVAL_HOURS', 24))
-OUTPUT_DIR = os.getenv('OUTPUT_DIR', './scan_reports')
+SCAN_INTERVAL_HOURS = int(ENV.get('SCAN_INTERVAL_HOURS', 24))
+OUTPUT_DIR = ENV.get('OUTPUT_DIR', './scan_reports')
 
-# 要排除的文件扩展名
-EXCLUDED_EXTENSIONS = [
+# 要排除的文件扩展名（小写，使用 frozenset 以 O(1) 判断成员）
+EXCLUDED_EXTENSIONS = frozenset({
     '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg',
     '.mp4', '.avi', '.mov', '.wmv',
     '.zip', '.tar', '.gz', '.rar',
     '.exe', '.dll', '.so', '.dylib',
     '.pdf', '.doc', '.docx',
-]
+})
 
 # 要排除的目录
-EXCLUDED_DIRS = [
+EXCLUDED_DIRS = frozenset({
     'node_modules',
     '.git',
     'dist',
@@ -37,12 +70,24 @@ EXCLUDED_DIRS = [
     '__pycache__',
     'venv',
     'env',
-]
+})
 
 # GitHub API速率限制
 MAX_REPOS_PER_SEARCH = 100
 SEARCH_DELAY_SECONDS = 2
 
+# 获取文件内容/commit详情时的最大并发请求数
+# GitHub 不建议对同一Token发起过多并发请求（会触发次级速率限制）
+MAX_CONCURRENT_REQUESTS = 10
+
+# 超过此大小（字节）的文件不下载检查，密钥几乎总是出现在小文件中
+MAX_FILE_SIZE_BYTES = 256_000
+
+# 批量搜索：多个密钥用 OR 合并为一次代码搜索
+# GitHub 搜索查询最长 256 个字符，且 OR 运算符数量有限，每组最多合并 5 个密钥
+SEARCH_QUERY_MAX_LENGTH = 256
+SEARCH_BATCH_SIZE = 5
+
 # ===== 监控模式配置 =====
 # 密钥清单文件（默认）
 SECRETS_LIST_FILE = 'secrets_to_monitor.txt'
@@ -50,11 +95,6 @@ SECRETS_LIST_FILE = 'secrets_to_monitor.txt'
 # 报告中显示密钥的前后字符数（隐藏中间部分）
 SECRET_MASK_LENGTH = 6
 
-# 每个密钥搜索间隔（秒），避免触发API速率限制
-# GitHub 搜索 API 限制：每分钟 30 次
-# 建议间隔：60秒/30次 = 2秒，为安全起见设为3秒
-SEARCH_DELAY_PER_SECRET = 2
-
 # 每个密钥最多返回结果数
 MAX_RESULTS_PER_SECRET = 100
 
@@ -3,11 +3,129 @@
 """
 钉钉消息通知模块
 """
+import logging
 import os
-import json
-import requests
-from typing import Dict, List
-from datetime import datetime
+import time
+from functools import lru_cache
+from typing import Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+try:
+    # 可选依赖：安装后使用 orjson 序列化消息体
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _format_timestamp(second: int) -> str:
+    """格式化时间戳（同一秒内的调用直接复用缓存结果）"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+
+
+def _now_str() -> str:
+    """返回当前时间字符串，格式: %Y-%m-%d %H:%M:%S"""
+    return _format_timestamp(int(time.time()))
+
+
+# 告警消息模板（模块加载时构建一次，发送时通过 format_map 填充）
+_LEAKAGE_ALERT_TEMPLATE = """## 🚨 密钥泄露告警
+
+**密钥类型**: {secret_type}
+
+**密钥值**: `{secret_masked}`
+
+**备注**: {secret_note}
+
+**泄露仓库**: [{repo_name}]({file_url})
+
+**泄露文件**: {file_path}
+
+**发现时间**: {scan_time}
+
+---
+
+### ⚠️ 立即行动
+
+1. 立即轮换该密钥
+2. 检查密钥使用日志
+3. 联系仓库所有者删除泄露代码
+4. 评估影响范围
+
+[查看详情]({file_url})
+"""
+
+# 合并告警：每处泄露一个条目，多个条目合并为一条钉钉消息
+_LEAKAGE_ENTRY_TEMPLATE = """**[{index}] {secret_type}**: `{secret_masked}`
+
+- **备注**: {secret_note}
+- **泄露仓库**: [{repo_name}]({file_url})
+- **泄露文件**: {file_path}
+- **发现时间**: {scan_time}
+"""
+
+_LEAKAGE_ALERTS_FOOTER = """
+---
+
+### ⚠️ 立即行动
+
+1. 立即轮换泄露的密钥
+2. 检查密钥使用日志
+3. 联系仓库所有者删除泄露代码
+4. 评估影响范围
+"""
+
+_BATCH_ALERT_TEMPLATE = """## 🚨 密钥泄露监控报告
+
+### 📊 扫描统计
+
+- **总密钥数**: {total_secrets} 个
+- **泄露密钥**: {leaked_secrets} 个
+- **泄露位置**: {total_leakages} 处
+- **泄露率**: {leakage_rate:.1f}%
+- **涉及仓库**: {unique_repos} 个
+
+---
+
+### 🔍 泄露详情 (前5个)
+
+{leak_summary_text}
+
+---
+
+### ⚠️ 建议操作
+
+1. 立即轮换所有泄露的密钥
+2. 检查密钥使用日志
+3. 评估影响范围
+4. 建立密钥管理规范
+
+扫描时间: {scan_time}
+"""
+
+_SUCCESS_TEMPLATE = """## ✅ 密钥泄露监控报告
+
+### 📊 扫描结果
+
+- **总密钥数**: {total_secrets} 个
+- **泄露密钥**: 0 个
+- **状态**: 安全
+
+---
+
+### 💡 建议
+
+- 继续保持良好的安全实践
+- 定期运行扫描检查
+- 对团队进行安全培训
+
+扫描时间: {scan_time}
+"""
 
 
 class DingTalkNotifier:
@@ -22,9 +140,43 @@ class DingTalkNotifier:
         """
         self.webhook_url = webhook_url or os.getenv('DINGTALK_WEBHOOK', '')
         self.enabled = bool(self.webhook_url)
+        self._session = self._create_session() if self.enabled else None
         
         if not self.enabled:
-            print("⚠️  未配置钉钉Webhook，通知功能已禁用")
+            logger.warning("⚠️  未配置钉钉Webhook，通知功能已禁用")
+    
+    def _create_session(self) -> 'requests.Session':
+        """
+        创建复用连接的HTTP会话
+        
+        连续发送多条告警时复用同一个 TLS 连接，避免每次请求重新握手；
+        只在请求确定未被处理时自动重试（连接失败、429 限流）。
+        推送消息不是幂等操作，5xx 或读取超时时服务端可能已经发出消息，重试会导致重复告警
+        
+        Returns:
+            配置好的 requests.Session
+        """
+        # 延迟导入：未配置 Webhook 时不加载 requests 及其依赖
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        retry = Retry(
+            total=2,
+            connect=2,   # 连接未建立，请求未发出
+            read=0,      # 请求已发出后读取失败，不重试
+            status=2,
+            backoff_factor=0.3,
+            status_forcelist=(429,),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+        
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
     
     def send_leakage_alert(self, leakage: Dict) -> bool:
         """
@@ -47,34 +199,18 @@ class DingTalkNotifier:
             repo_name = leakage.get('repo_name', '')
             file_path = leakage.get('file_path', '')
             file_url = leakage.get('file_url', '')
-            scan_time = leakage.get('scan_time', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            scan_time = leakage.get('scan_time') or _now_str()
             
             # 构建 Markdown 消息
-            markdown_text = f"""## 🚨 密钥泄露告警
-
-**密钥类型**: {secret_type}
-
-**密钥值**: `{secret_masked}`
-
-**备注**: {secret_note if secret_note else '无'}
-
-**泄露仓库**: [{repo_name}]({file_url})
-
-**泄露文件**: {file_path}
-
-**发现时间**: {scan_time}
-
----
-
-### ⚠️ 立即行动
-
-1. 立即轮换该密钥
-2. 检查密钥使用日志
-3. 联系仓库所有者删除泄露代码
-4. 评估影响范围
-
-[查看详情]({file_url})
-"""
+            markdown_text = _LEAKAGE_ALERT_TEMPLATE.format_map({
+                'secret_type': secret_type,
+                'secret_masked': secret_masked,
+                'secret_note': secret_note if secret_note else '无',
+                'repo_name': repo_name,
+                'file_path': file_path,
+                'file_url': file_url,
+                'scan_time': scan_time,
+            })
             
             # 构建钉钉消息
             data = {
@@ -89,28 +225,150 @@ class DingTalkNotifier:
             }
             
             # 发送请求
-            response = requests.post(
-                self.webhook_url,
-                headers={'Content-Type': 'application/json'},
-                data=json.dumps(data),
-                timeout=10
-            )
+            response = self._post(data)
             
             # 检查响应
             if response.status_code == 200:
                 result = response.json()
                 if result.get('errcode') == 0:
-                    print(f"  ✅ 已发送钉钉告警: {secret_type}")
+                    logger.info("  ✅ 已发送钉钉告警: %s", secret_type)
                     return True
                 else:
-                    print(f"  ❌ 钉钉消息发送失败: {result.get('errmsg', '未知错误')}")
+                    logger.error("  ❌ 钉钉消息发送失败: %s", result.get('errmsg', '未知错误'))
                     return False
             else:
-                print(f"  ❌ 钉钉请求失败: HTTP {response.status_code}")
+                logger.error("  ❌ 钉钉请求失败: HTTP %s", response.status_code)
                 return False
                 
         except Exception as e:
-            print(f"  ❌ 发送钉钉消息异常: {e}")
+            logger.error("  ❌ 发送钉钉消息异常: %s", e)
+            return False
+    
+    def send_leakage_alerts(self, leakages: List[Dict], chunk_bytes: int = 16000) -> bool:
+        """
+        合并发送多条密钥泄露告警
+        
+        将多处泄露拼接到同一条 Markdown 消息中，单条消息超过 chunk_bytes
+        （钉钉限制约 20KB）时分多条发送，减少 Webhook 调用次数
+        
+        Args:
+            leakages: 泄露信息列表
+            chunk_bytes: 单条消息的最大字节数
+            
+        Returns:
+            是否全部发送成功
+        """
+        if not self.enabled or not leakages:
+            return False
+        
+        # 只有一处泄露时保持原有的单条告警格式
+        if len(leakages) == 1:
+            return self.send_leakage_alert(leakages[0])
+        
+        footer_bytes = len(_LEAKAGE_ALERTS_FOOTER.encode('utf-8'))
+        chunks = []
+        entries = []
+        entries_bytes = 0
+        
+        for index, leakage in enumerate(leakages, 1):
+            entry = _LEAKAGE_ENTRY_TEMPLATE.format_map({
+                'index': index,
+                'secret_type': leakage.get('secret_type_display', '未知类型'),
+                'secret_masked': leakage.get('secret_masked', ''),
+                'secret_note': leakage.get('secret_note') or '无',
+                'repo_name': leakage.get('repo_name', ''),
+                'file_path': leakage.get('file_path', ''),
+                'file_url': leakage.get('file_url', ''),
+                'scan_time': leakage.get('scan_time') or _now_str(),
+            })
+            entry_bytes = len(entry.encode('utf-8')) + 1
+            
+            # 当前消息放不下时先发出已积累的条目
+            if entries and entries_bytes + entry_bytes + footer_bytes >= chunk_bytes:
+                chunks.append(entries)
+                entries = []
+                entries_bytes = 0
+            
+            entries.append(entry)
+            entries_bytes += entry_bytes
+        
+        if entries:
+            chunks.append(entries)
+        
+        all_sent = True
+        for chunk_idx, chunk_entries in enumerate(chunks, 1):
+            header = f"## 🚨 密钥泄露告警（{len(chunk_entries)} 处）\n\n"
+            if len(chunks) > 1:
+                header = f"## 🚨 密钥泄露告警（{len(chunk_entries)} 处，第 {chunk_idx}/{len(chunks)} 条）\n\n"
+            
+            data = {
+                "msgtype": "markdown",
+                "markdown": {
+                    "title": f"🚨 发现 {len(chunk_entries)} 处密钥泄露",
+                    "text": header + "\n".join(chunk_entries) + _LEAKAGE_ALERTS_FOOTER
+                },
+                "at": {
+                    "isAtAll": False
+                }
+            }
+            
+            if self._post_message(data):
+                logger.info("  ✅ 已发送钉钉合并告警: %s 处泄露", len(chunk_entries))
+            else:
+                all_sent = False
+        
+        return all_sent
+    
+    def _post(self, data: Dict) -> 'requests.Response':
+        """
+        POST 消息体到钉钉 Webhook
+        
+        安装了 orjson 时用其（C 实现）序列化，否则交给 requests 的 json= 参数
+        
+        Args:
+            data: 钉钉消息体
+            
+        Returns:
+            响应对象
+        """
+        if orjson is not None:
+            return self._session.post(
+                self.webhook_url,
+                data=orjson.dumps(data),
+                headers={'Content-Type': 'application/json'},
+                timeout=10
+            )
+        return self._session.post(
+            self.webhook_url,
+            json=data,
+            timeout=10
+        )
+    
+    def _post_message(self, data: Dict) -> bool:
+        """
+        发送钉钉消息并检查响应
+        
+        Args:
+            data: 钉钉消息体
+            
+        Returns:
+            发送是否成功
+        """
+        try:
+            response = self._post(data)
+            
+            if response.status_code == 200:
+                result = response.json()
+                if result.get('errcode') == 0:
+                    return True
+                logger.error("  ❌ 钉钉消息发送失败: %s", result.get('errmsg', '未知错误'))
+                return False
+            
+            logger.error("  ❌ 钉钉请求失败: HTTP %s", response.status_code)
+            return False
+        
+        except Exception as e:
+            logger.error("  ❌ 发送钉钉消息异常: %s", e)
             return False
     
     def send_batch_alert(self, leakages: List[Dict], statistics: Dict) -> bool:
@@ -147,33 +405,15 @@ class DingTalkNotifier:
                 leak_summary_text += f"\n\n... 还有 {len(leakages) - 5} 处泄露"
             
             # 构建 Markdown 消息
-            markdown_text = f"""## 🚨 密钥泄露监控报告
-
-### 📊 扫描统计
-
-- **总密钥数**: {total_secrets} 个
-- **泄露密钥**: {leaked_secrets} 个
-- **泄露位置**: {total_leakages} 处
-- **泄露率**: {leakage_rate:.1f}%
-- **涉及仓库**: {unique_repos} 个
-
----
-
-### 🔍 泄露详情 (前5个)
-
-{leak_summary_text}
-
----
-
-### ⚠️ 建议操作
-
-1. 立即轮换所有泄露的密钥
-2. 检查密钥使用日志
-3. 评估影响范围
-4. 建立密钥管理规范
-
-扫描时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
+            markdown_text = _BATCH_ALERT_TEMPLATE.format_map({
+                'total_secrets': total_secrets,
+                'leaked_secrets': leaked_secrets,
+                'total_leakages': total_leakages,
+                'leakage_rate': leakage_rate,
+                'unique_repos': unique_repos,
+                'leak_summary_text': leak_summary_text,
+                'scan_time': _now_str(),
+            })
             
             # 构建钉钉消息
             data = {
@@ -188,28 +428,23 @@ class DingTalkNotifier:
             }
             
             # 发送请求
-            response = requests.post(
-                self.webhook_url,
-                headers={'Content-Type': 'application/json'},
-                data=json.dumps(data),
-                timeout=10
-            )
+            response = self._post(data)
             
             # 检查响应
             if response.status_code == 200:
                 result = response.json()
                 if result.get('errcode') == 0:
-                    print(f"✅ 已发送钉钉批量告警")
+                    logger.info("✅ 已发送钉钉批量告警")
                     return True
                 else:
-                    print(f"❌ 钉钉消息发送失败: {result.get('errmsg', '未知错误')}")
+                    logger.error("❌ 钉钉消息发送失败: %s", result.get('errmsg', '未知错误'))
                     return False
             else:
-                print(f"❌ 钉钉请求失败: HTTP {response.status_code}")
+                logger.error("❌ 钉钉请求失败: HTTP %s", response.status_code)
                 return False
                 
         except Exception as e:
-            print(f"❌ 发送钉钉消息异常: {e}")
+            logger.error("❌ 发送钉钉消息异常: %s", e)
             return False
     
     def send_success_message(self, statistics: Dict) -> bool:
@@ -227,27 +462,13 @@ class DingTalkNotifier:
         
         try:
             total_secrets = statistics.get('total_secrets', 0)
-            scan_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            scan_time = _now_str()
             
             # 构建 Markdown 消息
-            markdown_text = f"""## ✅ 密钥泄露监控报告
-
-### 📊 扫描结果
-
-- **总密钥数**: {total_secrets} 个
-- **泄露密钥**: 0 个
-- **状态**: 安全
-
----
-
-### 💡 建议
-
-- 继续保持良好的安全实践
-- 定期运行扫描检查
-- 对团队进行安全培训
-
-扫描时间: {scan_time}
-"""
+            markdown_text = _SUCCESS_TEMPLATE.format_map({
+                'total_secrets': total_secrets,
+                'scan_time': scan_time,
+            })
             
             # 构建钉钉消息
             data = {
@@ -262,12 +483,7 @@ class DingTalkNotifier:
             }
             
             # 发送请求
-            response = requests.post(
-                self.webhook_url,
-                headers={'Content-Type': 'application/json'},
-                data=json.dumps(data),
-                timeout=10
-            )
+            response = self._post(data)
             
             # 检查响应
             if response.status_code == 200:
@@ -276,6 +492,6 @@ class DingTalkNotifier:
             return False
                 
         except Exception as e:
-            print(f"❌ 发送钉钉消息异常: {e}")
+            logger.error("❌ 发送钉钉消息异常: %s", e)
             return False
 
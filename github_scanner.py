@@ -1,16 +1,123 @@
 """
 GitHub仓库扫描模块 - 密钥泄露精确搜索
 """
+import logging
 import time
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 from github import Github, GithubException
-from config import GITHUB_TOKEN, SEARCH_DELAY_SECONDS
+from github.Commit import Commit
+from github.ContentFile import ContentFile
+from github.Issue import Issue
+from github.Repository import Repository
+try:
+    # 可选依赖：安装 pyahocorasick 后，一次扫描即可找出文本中出现的所有密钥
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+from config import (GITHUB_TOKEN, SEARCH_DELAY_SECONDS, MAX_CONCURRENT_REQUESTS,
+                    SEARCH_QUERY_MAX_LENGTH, SEARCH_BATCH_SIZE, MAX_FILE_SIZE_BYTES)
+
+logger = logging.getLogger(__name__)
+
+
+class SearchRateLimiter:
+    """
+    搜索请求令牌桶
+    
+    按每分钟的搜索配额匀速补充令牌：配额充足时不等待，令牌用完时只等到下一个令牌补充；
+    响应头显示配额已耗尽时一直等到重置时间。配额更新或切换Token后唤醒等待的线程
+    """
+    
+    def __init__(self, limit: int = 30, period: float = 60):
+        """
+        初始化令牌桶
+        
+        Args:
+            limit: 每个周期的搜索次数（桶容量）
+            period: 配额周期（秒）
+        """
+        self.period = period
+        self._cond = threading.Condition()
+        self.reset(limit)
+    
+    def reset(self, limit: Optional[int] = None):
+        """
+        重置为满桶（切换到配额未知的新Token时调用）
+        
+        Args:
+            limit: 每个周期的搜索次数（可选，默认保持不变）
+        """
+        with self._cond:
+            if limit:
+                self._capacity = limit
+            self._tokens = float(self._capacity)
+            self._updated_at = time.monotonic()
+            self._blocked_until = 0.0
+            self._cond.notify_all()
+    
+    def update(self, remaining: int, limit: int, reset_timestamp: float):
+        """
+        按响应头中的配额校正令牌数
+        
+        Args:
+            remaining: 剩余搜索次数
+            limit: 每个周期的搜索次数
+            reset_timestamp: 配额重置的Unix时间戳
+        """
+        with self._cond:
+            self._refill()
+            if limit:
+                self._capacity = limit
+            self._tokens = min(self._tokens, remaining, self._capacity)
+            # 配额已耗尽时等到重置时间（换算为 monotonic 时钟）
+            self._blocked_until = (time.monotonic() + max(0.0, reset_timestamp - time.time())
+                                   if remaining <= 0 else 0.0)
+            self._cond.notify_all()
+    
+    def acquire(self):
+        """取出一个令牌，没有令牌时阻塞等待"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    self._cond.wait(self._blocked_until - now)
+                    continue
+                if self._blocked_until:
+                    # 已过重置时间，配额恢复为满桶
+                    self._blocked_until = 0.0
+                    self._tokens = float(self._capacity)
+                    self._updated_at = now
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                self._cond.wait((1 - self._tokens) * self.period / self._capacity)
+    
+    def _refill(self):
+        """按经过的时间补充令牌（调用者需持有锁）"""
+        now = time.monotonic()
+        self._tokens = min(self._capacity,
+                           self._tokens + (now - self._updated_at) * self._capacity / self.period)
+        self._updated_at = now
 
 
 class GitHubScanner:
     """GitHub仓库扫描器"""
     
+    # 支持将多个密钥合并为一次搜索的类型
+    # （其他类型的结果处理默认命中即包含密钥，无法在合并搜索后区分归属）
+    BATCH_SEARCH_TYPES = ('code',)
+    
+    # 每次提交搜索最多检查的commits数量
+    MAX_COMMITS_TO_CHECK = 30
+    
+    # 扫描期间最多缓存的文件内容数量
+    FILE_CONTENT_CACHE_SIZE = 256
+    
     def __init__(self, token: str = GITHUB_TOKEN, token_manager=None):
         """
         初始化GitHub扫描器
@@ -25,14 +132,104 @@ class GitHubScanner:
         self.token_manager = token_manager
         self.current_token = token
         
+        # 最近一次搜索响应头中的配额 (remaining, limit, reset时间戳)，见 _record_response_headers
+        self._search_headers = None
+        self.github = self._create_main_github(token)
+        
+        # 当前Token的搜索配额缓存（见 get_search_rate_limit）
+        self.rate_limit_remaining = None
+        self.rate_limit_limit = None
+        self.rate_limit_reset = None
+        self._rate_limit_checked_at = 0.0
+        
+        # 搜索请求按配额匀速发出，取代每次搜索后的固定延迟
+        self._search_limiter = SearchRateLimiter()
+        
+        # 并发获取文件内容/commit详情用的线程池（首次使用时创建）
+        # PyGithub 的连接对象不是线程安全的，每个工作线程使用自己的 Github 实例
+        self._executor = None
+        self._thread_local = threading.local()
+        
+        # 扫描期间的缓存：同一文件（按blob sha区分版本）只下载一次，同一仓库的信息只获取一次
+        # 只缓存确定的结果，临时错误（超时、5xx、滥用限制）不缓存，避免该文件在整个扫描中被当作无内容
+        self._file_content_cache: Dict[Tuple[str, str, Optional[str]], Optional[str]] = {}
+        self._file_content_lock = threading.Lock()
+        self._repo_info_cache: Dict[str, Dict] = {}
+    
+    @staticmethod
+    def _create_github(token: str) -> Github:
+        """创建Github实例"""
         # 配置超时和重试参数，避免长时间等待
-        self.github = Github(
+        return Github(
             token,
             timeout=30,  # 设置30秒超时
-            retry=None   # 禁用自动重试，我们自己处理
+            retry=None,  # 禁用自动重试，我们自己处理
+            per_page=100  # 搜索结果每页取最大条数，减少翻页请求
         )
-        self.rate_limit_remaining = None
-        self.rate_limit_reset = None
+    
+    def _create_main_github(self, token: str) -> Github:
+        """
+        创建主线程使用的Github实例，并记录其中搜索响应的配额响应头
+        
+        self.github 除搜索外还会请求 /rate_limit、补全仓库信息等，这些响应头里是核心API的配额，
+        Github.rate_limiting 无法区分，因此只保留 X-RateLimit-Resource 为 search 的响应头
+        """
+        github = self._create_github(token)
+        # PyGithub 每次响应都会调用 Requester.DEBUG_ON_RESPONSE（默认不做任何事），借此拿到响应头
+        requester = getattr(github, '_Github__requester', None)
+        if requester is not None:
+            requester.DEBUG_ON_RESPONSE = self._record_response_headers
+        return github
+    
+    def _record_response_headers(self, status: int, headers: Dict[str, Any], data: str):
+        """记录搜索API响应头中的配额（响应头的键已被 PyGithub 转为小写）"""
+        if headers.get('x-ratelimit-resource') != 'search':
+            return
+        try:
+            self._search_headers = (
+                int(float(headers['x-ratelimit-remaining'])),
+                int(float(headers['x-ratelimit-limit'])),
+                int(float(headers['x-ratelimit-reset'])),
+            )
+        except (KeyError, ValueError):
+            pass
+    
+    def _get_thread_github(self) -> Github:
+        """获取当前工作线程专用的Github实例（Token切换后自动重建）"""
+        local = self._thread_local
+        if getattr(local, 'token', None) != self.current_token:
+            local.github = self._create_github(self.current_token)
+            local.token = self.current_token
+        return local.github
+    
+    def _run_concurrently(self, func: Callable, items: List) -> List[Any]:
+        """
+        在线程池中并发执行 func(item)
+        
+        Args:
+            func: 对每个元素执行的函数
+            items: 元素列表
+            
+        Returns:
+            与 items 顺序一致的结果列表；执行失败的元素对应位置为异常对象
+        """
+        if not items:
+            return []
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENT_REQUESTS,
+                thread_name_prefix='github-fetch'
+            )
+        
+        futures = [self._executor.submit(func, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
         
     def get_rate_limit_info(self) -> Dict:
         """获取API速率限制信息"""
@@ -45,6 +242,79 @@ class GitHubScanner:
             'reset': core.reset
         }
     
+    def get_search_rate_limit(self, max_age: float = 60) -> Dict:
+        """
+        获取当前Token的搜索API配额（优先使用缓存）
+        
+        每次搜索后在本地扣减剩余次数，只有在尚未获取过、缓存超过 max_age 秒
+        或已过重置时间时才请求 /rate_limit，避免每次搜索前都多一次往返
+        
+        Args:
+            max_age: 缓存有效期（秒），传 0 强制刷新
+            
+        Returns:
+            {'remaining': 剩余次数, 'limit': 总次数, 'reset': 重置时间}
+        """
+        now = time.time()
+        if (self.rate_limit_remaining is None
+                or self.rate_limit_reset is None
+                or now - self._rate_limit_checked_at >= max_age
+                or now >= self.rate_limit_reset.timestamp()):
+            self._update_search_rate_limit(self.github.get_rate_limit().search)
+        
+        return {
+            'remaining': self.rate_limit_remaining,
+            'limit': self.rate_limit_limit,
+            'reset': self.rate_limit_reset
+        }
+    
+    def _update_search_rate_limit(self, search_limit):
+        """用 /rate_limit 返回的搜索配额更新缓存"""
+        self.rate_limit_remaining = search_limit.remaining
+        self.rate_limit_limit = search_limit.limit
+        self.rate_limit_reset = search_limit.reset
+        self._rate_limit_checked_at = time.time()
+        self._search_limiter.update(search_limit.remaining, search_limit.limit, search_limit.reset.timestamp())
+        self._report_search_rate_limit()
+    
+    def _report_search_rate_limit(self):
+        """把当前Token的搜索配额同步给Token管理器，用于按配额选择下一个Token"""
+        if self.token_manager and self.rate_limit_remaining is not None:
+            self.token_manager.record_search_rate_limit(
+                self.current_token,
+                self.rate_limit_remaining,
+                self.rate_limit_limit,
+                self.rate_limit_reset
+            )
+    
+    def _consume_search_quota(self, exhausted: bool = False):
+        """
+        记录一次搜索请求，更新缓存的剩余次数
+        
+        优先使用本次搜索响应头中的配额（见 _record_response_headers），不需要再请求 /rate_limit；
+        没有拿到搜索响应头时退回在本地扣减
+        
+        Args:
+            exhausted: 是否已触发速率限制（剩余次数直接置0）
+        """
+        search_headers, self._search_headers = self._search_headers, None
+        
+        if search_headers is not None:
+            remaining, limit, reset = search_headers
+            self.rate_limit_remaining = remaining
+            self.rate_limit_limit = limit
+            self.rate_limit_reset = datetime.fromtimestamp(reset, timezone.utc)
+            self._rate_limit_checked_at = time.time()
+        elif self.rate_limit_remaining is not None:
+            self.rate_limit_remaining = max(0, self.rate_limit_remaining - 1)
+        
+        if exhausted:
+            self.rate_limit_remaining = 0
+        if self.rate_limit_remaining is not None and self.rate_limit_reset is not None:
+            self._search_limiter.update(self.rate_limit_remaining, self.rate_limit_limit,
+                                        self.rate_limit_reset.timestamp())
+        self._report_search_rate_limit()
+    
     def switch_token_if_needed(self, force=False):
         """检查配额并在需要时切换Token
         
@@ -61,39 +331,62 @@ class GitHubScanner:
         try:
             # 如果不是强制切换，检查是否需要切换
             if not force:
-                rate_limit = self.github.get_rate_limit()
-                search_limit = rate_limit.search
+                search_limit = self.get_search_rate_limit()
                 
                 # 配额充足，不需要切换
-                if search_limit.remaining > 2:
+                if search_limit['remaining'] > 2:
                     return False
                 
-                print(f"  ⚠️  当前Token配额不足 (剩余: {search_limit.remaining})")
+                logger.warning("  ⚠️  当前Token配额不足 (剩余: %s)", search_limit['remaining'])
             
             # 获取下一个Token（循环轮询）
             old_token = self.current_token
-            new_token = self.token_manager.get_next_token()
+            new_token = self.token_manager.get_next_token(old_token)
             
-            # 如果新Token和当前Token相同，说明只有1个Token
+            # 如果新Token和当前Token相同，说明只有1个Token（或其他Token都被其他扫描器占用）
             if new_token == old_token:
                 return False
             
             # 切换到新Token
-            print(f"  ✅ 切换到下一个Token...")
+            logger.info("  ✅ 切换到下一个Token...")
             self.current_token = new_token
             
-            # 重新创建Github实例
-            self.github = Github(
-                new_token,
-                timeout=30,
-                retry=None
-            )
+            # 重新创建Github实例，新Token的配额需要重新获取
+            self.github = self._create_main_github(new_token)
+            self._search_headers = None
+            self.rate_limit_remaining = None
+            self._search_limiter.reset()
             return True
             
         except Exception as e:
-            print(f"  ⚠️  检查配额失败: {e}")
+            logger.warning("  ⚠️  检查配额失败: %s", e)
             return False
     
+    def _search_reset_wait_seconds(self) -> float:
+        """
+        计算触发搜索速率限制后需要等待的秒数
+        
+        多Token时等到池中最早重置的Token，否则按当前Token的实际重置时间等待，
+        而不是固定等待一整个限流窗口
+        
+        Returns:
+            等待秒数（1-70秒）
+        """
+        try:
+            wait_time = None
+            if self.token_manager:
+                wait_time = self.token_manager.seconds_until_available()
+            if not wait_time:
+                # 重新获取当前Token的实际重置时间
+                search_limit = self.get_search_rate_limit(max_age=0)
+                if search_limit['remaining'] > 0:
+                    # 配额未耗尽却被限制（次级速率限制），等待一个完整窗口
+                    return 60
+                wait_time = search_limit['reset'].timestamp() - time.time()
+        except Exception:
+            return 60
+        return max(1, min(wait_time + 2, 70))
+    
     def wait_for_rate_limit(self):
         """等待速率限制重置"""
         # 先尝试切换Token
@@ -103,59 +396,90 @@ class GitHubScanner:
         # 如果切换失败，才等待
         info = self.get_rate_limit_info()
         if info['remaining'] < 10:
-            # info['reset'] 是 datetime 对象，需要和 datetime.now() 比较
-            wait_time = (info['reset'] - datetime.now()).total_seconds() + 10
-            print(f"⚠️  API速率限制即将耗尽，等待 {wait_time:.0f} 秒...")
+            # info['reset'] 是带时区的 UTC 时间，按时间戳计算剩余秒数
+            wait_time = info['reset'].timestamp() - time.time() + 10
+            logger.warning("⚠️  API速率限制即将耗尽，等待 %.0f 秒...", wait_time)
             time.sleep(max(0, wait_time))
     
     def display_rate_limit(self):
         """显示当前 API 速率限制状态"""
         try:
             rate_limit = self.github.get_rate_limit()
+            now = time.time()
             
-            # 核心 API 限制
+            # 核心 API 限制（重置时间为 UTC，转换为本地时间显示）
             core = rate_limit.core
-            print(f"📊 核心 API 限制: {core.remaining}/{core.limit} 剩余")
+            logger.info("📊 核心 API 限制: %s/%s 剩余", core.remaining, core.limit)
             if core.remaining < 100:
-                reset_time = core.reset.strftime('%H:%M:%S')
-                print(f"   ⚠️  剩余次数较少，将在 {reset_time} 重置")
+                reset_time = core.reset.astimezone().strftime('%H:%M:%S')
+                logger.warning("   ⚠️  剩余次数较少，将在 %s 重置", reset_time)
             
             # 搜索 API 限制 (重要！)
             search = rate_limit.search
-            print(f"🔍 搜索 API 限制: {search.remaining}/{search.limit} 剩余")
+            self._update_search_rate_limit(search)
+            logger.info("🔍 搜索 API 限制: %s/%s 剩余", search.remaining, search.limit)
             if search.remaining < 10:
-                reset_time = search.reset.strftime('%H:%M:%S')
-                reset_seconds = (search.reset - datetime.now()).total_seconds()
-                print(f"   ⚠️  搜索配额不足，将在 {reset_time} 重置（约 {int(reset_seconds)} 秒后）")
+                reset_time = search.reset.astimezone().strftime('%H:%M:%S')
+                reset_seconds = search.reset.timestamp() - now
+                logger.warning("   ⚠️  搜索配额不足，将在 %s 重置（约 %d 秒后）", reset_time, reset_seconds)
             
         except Exception as e:
-            print(f"   ℹ️  无法获取速率限制信息: {e}")
+            logger.info("   ℹ️  无法获取速率限制信息: %s", e)
     
-    def get_file_content(self, repo_full_name: str, file_path: str) -> Optional[str]:
+    def get_file_content(self, repo_full_name: str, file_path: str, sha: str = None) -> Optional[str]:
         """
-        获取文件内容
+        获取文件内容（带缓存）
         
         Args:
             repo_full_name: 仓库全名 (owner/repo)
             file_path: 文件路径
+            sha: 文件的blob sha（可选，用于区分同一路径的不同版本）
             
         Returns:
             文件内容（文本）
         """
+        key = (repo_full_name, file_path, sha)
         try:
-            repo = self.github.get_repo(repo_full_name)
-            content = repo.get_contents(file_path)
-            
-            # 解码内容
-            try:
-                return content.decoded_content.decode('utf-8')
-            except UnicodeDecodeError:
-                # 如果是二进制文件，返回None
-                return None
+            return self._file_content_cache[key]
+        except KeyError:
+            pass
+        
+        try:
+            content = self._fetch_file_content(repo_full_name, file_path, sha)
         except GithubException as e:
-            # 403 错误直接跳过，不打印错误
-            if e.status == 403:
-                pass  # 静默跳过
+            if e.status != 404:
+                # 临时错误不缓存，再次遇到该文件时重新下载
+                return None
+            content = None
+        
+        with self._file_content_lock:
+            self._file_content_cache[key] = content
+            if len(self._file_content_cache) > self.FILE_CONTENT_CACHE_SIZE:
+                # 字典保持插入顺序，淘汰最早缓存的文件
+                del self._file_content_cache[next(iter(self._file_content_cache))]
+        return content
+    
+    def _fetch_file_content(self, repo_full_name: str, file_path: str, sha: str = None) -> Optional[str]:
+        """从GitHub下载并解码文件内容（sha 仅作为缓存键，请求失败时抛出 GithubException）"""
+        # 可能在线程池中调用，使用当前线程专用的Github实例
+        # lazy=True 不请求仓库信息，只用于构造文件内容的请求地址
+        repo = self._get_thread_github().get_repo(repo_full_name, lazy=True)
+        content = repo.get_contents(file_path)
+        
+        # 过大的文件不解码
+        if content.size and content.size > MAX_FILE_SIZE_BYTES:
+            return None
+        
+        # 开头出现NUL字节的视为二进制文件，跳过完整解码
+        raw = content.decoded_content
+        if b'\x00' in raw[:4096]:
+            return None
+        
+        # 解码内容
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            # 如果是二进制文件，返回None
             return None
     
     def search_secret_leakage(self, secret_value: str, max_results: int = 100, max_retries: int = 3, 
@@ -172,14 +496,115 @@ class GitHubScanner:
         Returns:
             泄露位置列表，每个包含仓库、文件、行号等信息
         """
-        all_results = []
+        return self.search_secret_leakage_batch(
+            [secret_value], max_results, max_retries, search_types
+        )[secret_value]
+    
+    def search_secret_leakage_batch(self, secret_values: List[str], max_results: int = 100, max_retries: int = 3,
+                                    search_types: List[str] = ['code']) -> Dict[str, List[Dict]]:
+        """
+        批量搜索多个密钥是否泄露到GitHub
+        
+        支持合并的搜索类型会把多个密钥用 OR 拼成一次搜索，
+        再按文件内容把每个命中归属到实际包含的密钥
+        
+        Args:
+            secret_values: 要搜索的密钥值列表
+            max_results: 每个密钥最多返回结果数
+            max_retries: 最大重试次数
+            search_types: 搜索类型列表，可选: 'code', 'commits', 'issues'
+            
+        Returns:
+            {密钥值: 泄露位置列表}
+        """
+        values = list(dict.fromkeys(secret_values))
+        all_results = {value: [] for value in values}
         
         for search_type in search_types:
-            results = self._search_by_type(secret_value, search_type, max_results, max_retries)
-            all_results.extend(results)
+            if search_type in self.BATCH_SEARCH_TYPES:
+                groups = self._pack_search_groups(values)
+            else:
+                groups = [[value] for value in values]
+            
+            for group in groups:
+                group_results = self._search_group(group, search_type, max_results, max_retries)
+                for value, results in group_results.items():
+                    all_results[value].extend(results)
         
         return all_results
     
+    @staticmethod
+    def _build_secret_matcher(secret_values: List[str]) -> Callable[[str], set]:
+        """
+        构造多密钥匹配函数，返回文本中出现的密钥集合
+        
+        安装了 pyahocorasick 时使用 Aho-Corasick 自动机（C 实现，一次扫描匹配所有密钥），
+        否则逐个密钥做子串判断
+        
+        Args:
+            secret_values: 密钥值列表
+            
+        Returns:
+            匹配函数
+        """
+        if ahocorasick is None:
+            return lambda text: {value for value in secret_values if value in text}
+        
+        automaton = ahocorasick.Automaton()
+        for value in secret_values:
+            automaton.add_word(value, value)
+        automaton.make_automaton()
+        return lambda text: {value for _, value in automaton.iter(text)}
+    
+    def _attribute_code_hits(self, hits: List[ContentFile], secret_values: List[str]) -> Dict[str, List[ContentFile]]:
+        """
+        将合并搜索的代码命中按匹配片段归属到各个密钥
+        
+        Args:
+            hits: 代码搜索命中列表
+            secret_values: 本次合并搜索的密钥值列表
+            
+        Returns:
+            {密钥值: 命中列表}，没有匹配片段的命中归属到所有密钥
+        """
+        match = self._build_secret_matcher(secret_values)
+        hits_by_secret = {value: [] for value in secret_values}
+        for code in hits:
+            fragments = self._text_match_fragments(code)
+            found = secret_values if fragments is None else match('\n'.join(fragments))
+            for value in found:
+                hits_by_secret[value].append(code)
+        return hits_by_secret
+    
+    @staticmethod
+    def _build_search_query(secret_values: List[str]) -> str:
+        """构造精确搜索查询（特殊字符需要用引号包裹）"""
+        return ' OR '.join(f'"{value}"' for value in secret_values)
+    
+    @classmethod
+    def _pack_search_groups(cls, secret_values: List[str]) -> List[List[str]]:
+        """
+        将密钥按顺序贪心打包为若干组，每组查询不超过长度和 OR 数量限制
+        
+        Args:
+            secret_values: 密钥值列表
+            
+        Returns:
+            分组后的密钥列表
+        """
+        groups = []
+        group = []
+        for value in secret_values:
+            candidate = group + [value]
+            if group and (len(candidate) > SEARCH_BATCH_SIZE or
+                          len(cls._build_search_query(candidate)) > SEARCH_QUERY_MAX_LENGTH):
+                groups.append(group)
+                candidate = [value]
+            group = candidate
+        if group:
+            groups.append(group)
+        return groups
+    
     def _search_by_type(self, secret_value: str, search_type: str, max_results: int, max_retries: int) -> List[Dict]:
         """
         按类型搜索密钥泄露
@@ -193,16 +618,32 @@ class GitHubScanner:
         Returns:
             泄露位置列表
         """
-        results = []
+        return self._search_group([secret_value], search_type, max_results, max_retries)[secret_value]
+    
+    def _search_group(self, secret_values: List[str], search_type: str, max_results: int,
+                      max_retries: int) -> Dict[str, List[Dict]]:
+        """
+        按类型搜索一组密钥（一次搜索请求）
+        
+        Args:
+            secret_values: 要搜索的密钥值列表
+            search_type: 搜索类型 ('code', 'commits', 'issues', 'pr')
+            max_results: 每个密钥最多返回结果数
+            max_retries: 最大重试次数
+            
+        Returns:
+            {密钥值: 泄露位置列表}
+        """
+        results = {value: [] for value in secret_values}
         
         for attempt in range(max_retries):
             try:
                 # 使用GitHub Code Search API精确搜索
                 # 注意：某些特殊字符需要用引号包裹
-                search_query = f'"{secret_value}"'
+                search_query = self._build_search_query(secret_values)
                 
                 if attempt > 0:
-                    print(f"  🔄 重试第 {attempt} 次...")
+                    logger.info("  🔄 重试第 %d 次...", attempt)
                 else:
                     # 根据搜索类型显示不同的提示
                     type_emoji = {
@@ -219,106 +660,107 @@ class GitHubScanner:
                     }
                     emoji = type_emoji.get(search_type, '🔎')
                     name = type_name.get(search_type, search_type)
-                    print(f"  {emoji} 搜索 {name}...")
+                    logger.info("  %s 搜索 %s...", emoji, name)
                 
                 # 在搜索前主动检查速率限制并切换Token（如果需要）
                 if self.token_manager:
                     try:
-                        rate_limit = self.github.get_rate_limit()
-                        search_limit = rate_limit.search
-                        if search_limit.remaining <= 2:
-                            print(f"  ⚠️  当前Token搜索配额不足 ({search_limit.remaining}/{search_limit.limit})")
-                            print(f"  🔄 主动切换到下一个Token...")
+                        search_limit = self.get_search_rate_limit()
+                        if search_limit['remaining'] <= 2:
+                            logger.warning("  ⚠️  当前Token搜索配额不足 (%s/%s)", search_limit['remaining'], search_limit['limit'])
+                            logger.info("  🔄 主动切换到下一个Token...")
                             if not self.switch_token_if_needed():
                                 # 切换失败，说明只有1个Token（继续执行，让API调用触发限制异常后再等待）
                                 pass
                     except Exception:
                         pass  # 检查失败，继续执行
                 
+                # 按令牌桶控制搜索频率（配额充足时不等待）
+                self._search_limiter.acquire()
+                self._search_headers = None
+                
                 # 根据类型选择不同的搜索API
                 if search_type == 'code':
-                    search_results = self.github.search_code(search_query)
+                    # highlight=True 请求 text-match 媒体类型，结果自带匹配片段
+                    search_results = self.github.search_code(search_query, highlight=True)
                 elif search_type == 'commits':
-                    search_results = self.github.search_commits(search_query)
-                    # 调试：显示找到的commits数量
-                    try:
-                        total_count = search_results.totalCount
-                        if total_count > 0:
-                            print(f"  ℹ️  搜索API返回 {total_count} 个commits，正在检查差异...")
-                    except:
-                        pass
+                    search_results = self._search_commits(search_query)
                 elif search_type == 'issues' or search_type == 'pr':
                     # issues 和 pr 都使用 search_issues API，但后续处理会过滤
                     search_results = self.github.search_issues(search_query)
                 else:
-                    print(f"  ⚠️  未知的搜索类型: {search_type}")
-                    return []
+                    logger.warning("  ⚠️  未知的搜索类型: %s", search_type)
+                    return results
+                
+                # 代码/议题结果可能翻页，每一页都是一次搜索请求（提交搜索只取第一页）
+                if search_type != 'commits':
+                    search_results = self._paced_pages(search_results, self.github.per_page)
+                
+                # 合并搜索时先取出命中列表，按匹配片段归属到各个密钥（分页结果只能遍历一次）
+                hits_by_secret = {value: search_results for value in secret_values}
+                if len(secret_values) > 1:
+                    hits = list(islice(search_results, max_results * len(secret_values)))
+                    hits_by_secret = self._attribute_code_hits(hits, secret_values)
                 
                 # 根据类型处理搜索结果
-                if search_type == 'code':
-                    results = self._process_code_results(search_results, secret_value, max_results)
-                elif search_type == 'commits':
-                    results = self._process_commit_results(search_results, secret_value, max_results)
-                elif search_type == 'issues':
-                    results = self._process_issue_results(search_results, secret_value, max_results, only_issues=True)
-                elif search_type == 'pr':
-                    results = self._process_issue_results(search_results, secret_value, max_results, only_pr=True)
+                for secret_value in secret_values:
+                    search_results = hits_by_secret[secret_value]
+                    if search_type == 'code':
+                        results[secret_value] = self._process_code_results(search_results, secret_value, max_results)
+                    elif search_type == 'commits':
+                        results[secret_value] = self._process_commit_results(search_results, secret_value, max_results)
+                    elif search_type == 'issues':
+                        results[secret_value] = self._process_issue_results(search_results, secret_value, max_results, only_issues=True)
+                    elif search_type == 'pr':
+                        results[secret_value] = self._process_issue_results(search_results, secret_value, max_results, only_pr=True)
                 
                 # 搜索成功，跳出重试循环
-                if results:
-                    print(f"  ⚠️  发现 {len(results)} 处泄露")
+                self._consume_search_quota()
+                found = sum(len(r) for r in results.values())
+                if found:
+                    logger.warning("  ⚠️  发现 %d 处泄露", found)
                 else:
-                    print(f"  ✅ 未发现泄露")
+                    logger.info("  ✅ 未发现泄露")
                 break
                 
             except GithubException as e:
                 error_msg = str(e)
                 if "rate limit" in error_msg.lower():
-                    print(f"  ⚠️  触发 GitHub 搜索 API 速率限制")
+                    logger.warning("  ⚠️  触发 GitHub 搜索 API 速率限制")
+                    self._consume_search_quota(exhausted=True)
                     
                     # 如果配置了token_manager，尝试切换Token
                     if self.token_manager:
-                        print(f"  🔄 切换到下一个Token...")
-                        if self.switch_token_if_needed(force=True):
-                            # 切换成功，重试当前请求（不计入重试次数）
+                        logger.info("  🔄 切换到下一个Token...")
+                        switched = self.switch_token_if_needed(force=True)
+                        if switched and self.token_manager.seconds_until_available() == 0:
+                            # 切换到仍有配额的Token，立即重试当前请求
                             continue
+                        elif switched:
+                            logger.warning("  ⚠️  所有Token的搜索配额均已耗尽，需要等待重置")
                         else:
                             # 切换失败，说明只有1个Token
-                            print(f"  ⚠️  只有1个Token，需要等待重置")
+                            logger.warning("  ⚠️  只有1个Token，需要等待重置")
                     
-                    # 没有token_manager或只有1个Token，等待重置
-                    print(f"     （GitHub 限制：每分钟最多 30 次搜索）")
+                    # 没有可用Token时，等到最早重置的Token恢复配额
+                    logger.info("     （GitHub 限制：每分钟最多 30 次搜索）")
                     if attempt < max_retries - 1:
-                        # 检查实际的重置时间
-                        try:
-                            rate_limit = self.github.get_rate_limit()
-                            search_limit = rate_limit.search
-                            if search_limit.remaining == 0:
-                                wait_time = (search_limit.reset - datetime.now()).total_seconds() + 5
-                                wait_time = max(60, min(wait_time, 70))  # 限制在60-70秒之间
-                                print(f"     等待 {int(wait_time)} 秒后重试...")
-                                time.sleep(wait_time)
-                            else:
-                                wait_time = 60
-                                print(f"     等待 {wait_time} 秒后重试...")
-                                time.sleep(wait_time)
-                        except:
-                            wait_time = 60
-                            print(f"     等待 {wait_time} 秒后重试...")
-                            time.sleep(wait_time)
+                        wait_time = self._search_reset_wait_seconds()
+                        logger.info("     等待 %d 秒后重试...", wait_time)
+                        time.sleep(wait_time)
                     else:
-                        print(f"     已达到最大重试次数，跳过此密钥")
+                        logger.info("     已达到最大重试次数，跳过此密钥")
                 elif "403" in error_msg:
-                    print(f"  ⚠️  搜索被限制（403）")
+                    logger.warning("  ⚠️  搜索被限制（403）")
                     break  # 403 错误不重试
                 else:
-                    print(f"  ⚠️  搜索失败: {e}")
+                    logger.warning("  ⚠️  搜索失败: %s", e)
                     if attempt < max_retries - 1:
                         time.sleep(5)  # 等待5秒后重试
                     else:
                         break
             except Exception as e:
-                print(f"  ❌ 搜索出错: {e}")
+                logger.error("  ❌ 搜索出错: %s", e)
                 if attempt < max_retries - 1:
                     time.sleep(5)
                 else:
@@ -326,46 +768,188 @@ class GitHubScanner:
         
         return results
     
-    def _process_code_results(self, search_results, secret_value: str, max_results: int) -> List[Dict]:
+    def _paced_pages(self, search_results: Iterable, per_page: int) -> Iterator:
+        """
+        遍历分页的搜索结果，请求后续每一页前都从令牌桶取令牌并记录上一页消耗的配额
+        
+        第一页的令牌由调用方在发起搜索前获取，最后一页的配额由调用方在处理完成后记录；
+        最后一页恰好满页时会多取一个令牌（宁可多算，不会超出配额）
+        
+        Args:
+            search_results: PyGithub 分页结果
+            per_page: 每页条数
+            
+        Yields:
+            搜索结果
+        """
+        iterator = iter(search_results)
+        index = 0
+        while True:
+            if index and index % per_page == 0:
+                # 上一页已遍历完，继续遍历会请求下一页
+                self._consume_search_quota()
+                self._search_limiter.acquire()
+                self._search_headers = None
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            yield item
+            index += 1
+    
+    def _process_code_results(self, search_results: Iterable[ContentFile], secret_value: str,
+                              max_results: int) -> List[Dict[str, Any]]:
         """处理代码搜索结果"""
         results = []
-        count = 0
         
+        # 先收集候选文件（同一文件只保留一次）
+        unique = {}
         for code in search_results:
-            if count >= max_results:
+            if len(unique) >= max_results:
+                break
+            unique.setdefault((code.repository.full_name, code.path), code)
+        
+        # 匹配片段中不含完整密钥的命中（搜索分词造成的误报）无需下载文件
+        candidates = []
+        for code in unique.values():
+            fragments = self._text_match_fragments(code)
+            if fragments is not None and not any(secret_value in f for f in fragments):
+                continue
+            candidates.append((code, fragments))
+        
+        # 并发获取文件内容以确认匹配和获取行号（片段中没有行号信息）
+        contents = self._run_concurrently(lambda item: self._fetch_code_content(item[0]), candidates)
+        
+        matched = []
+        for (code, fragments), content in zip(candidates, contents):
+            if len(matched) >= max_results:
                 break
             
             try:
-                # 获取文件内容以确认匹配和获取行号
-                content = self.get_file_content(code.repository.full_name, code.path)
+                if isinstance(content, Exception):
+                    content = None
                 
                 if content and secret_value in content:
                     # 找到包含密钥的行
-                    lines = content.split('\n')
-                    for line_num, line in enumerate(lines, 1):
-                        if secret_value in line:
-                            results.append({
-                                'type': 'Code',
-                                'repo_name': code.repository.full_name,
-                                'repo_url': code.repository.html_url,
-                                'file_path': code.path,
-                                'file_url': code.html_url,
-                                'line_number': line_num,
-                                'line_content': line.strip(),
-                                'repo_owner': code.repository.owner.login,
-                                'repo_description': code.repository.description,
-                                'repo_updated_at': code.repository.updated_at,
-                                'repo_stars': code.repository.stargazers_count,
-                            })
-                    count += 1
+                    matches = list(self._find_matching_lines(content, secret_value))
+                elif content is None and fragments:
+                    # 文件内容获取失败时，退回使用搜索结果中的匹配片段（行号未知）
+                    matches = [('未知', line) for f in fragments
+                               for line in f.splitlines() if secret_value in line]
+                else:
+                    matches = []
+                
+                if matches:
+                    matched.append((code, matches))
             
             except Exception:
                 # 跳过获取失败的文件
                 continue
         
+        # 搜索结果中的仓库对象不含星标数和更新时间，访问时每个结果都会单独补全一次；
+        # 改为每个仓库只请求一次
+        repo_names = [code.repository.full_name for code, _ in matched]
+        self._load_repo_infos(repo_names)
+        
+        for (code, matches), repo_name in zip(matched, repo_names):
+            repo_info = self._get_repo_info(repo_name)
+            for line_num, line in matches:
+                results.append({
+                    'type': 'Code',
+                    'repo_name': repo_name,
+                    'repo_url': repo_info['repo_url'],
+                    'file_path': code.path,
+                    'file_url': code.html_url,
+                    'line_number': line_num,
+                    'line_content': line.strip(),
+                    'repo_owner': repo_info['repo_owner'],
+                    'repo_description': repo_info['repo_description'],
+                    'repo_updated_at': repo_info['repo_updated_at'],
+                    'repo_stars': repo_info['repo_stars'],
+                })
+        
         return results
     
-    def _process_commit_results(self, search_results, secret_value: str, max_results: int) -> List[Dict]:
+    def _fetch_code_content(self, code: ContentFile) -> Optional[str]:
+        """获取代码搜索命中的文件内容，过大的文件直接跳过下载"""
+        # 代码搜索结果中文件大小的字段是 file_size；访问 code.size 会触发 PyGithub 补全请求，
+        # 因此直接读取原始数据（没有该字段时由下载后的大小检查兜底）
+        if (code._rawData.get('file_size') or 0) > MAX_FILE_SIZE_BYTES:
+            return None
+        return self.get_file_content(code.repository.full_name, code.path, code.sha)
+    
+    @staticmethod
+    def _text_match_fragments(code: ContentFile) -> Optional[List[str]]:
+        """
+        获取代码搜索结果中的 text-match 匹配片段
+        
+        Args:
+            code: 代码搜索结果
+            
+        Returns:
+            匹配片段列表，搜索结果未携带片段时返回 None
+        """
+        try:
+            text_matches = code.text_matches
+        except Exception:
+            return None
+        if not text_matches:
+            return None
+        return [m.get('fragment') or '' for m in text_matches]
+    
+    @staticmethod
+    def _find_matching_lines(content: str, secret_value: str) -> Iterator[Tuple[int, str]]:
+        """
+        查找包含密钥的行
+        
+        用 str.find 直接定位匹配位置并用 str.count 计算行号，
+        不需要把整个文件拆分成行列表
+        
+        Args:
+            content: 文件内容
+            secret_value: 密钥值
+            
+        Yields:
+            (行号, 行内容)，同一行只返回一次
+        """
+        line_num = 1
+        counted = 0
+        pos = content.find(secret_value)
+        while pos >= 0:
+            line_num += content.count('\n', counted, pos)
+            line_start = content.rfind('\n', 0, pos) + 1
+            line_end = content.find('\n', pos)
+            if line_end < 0:
+                line_end = len(content)
+            
+            yield line_num, content[line_start:line_end]
+            
+            # 从下一行开始继续查找
+            counted = line_end
+            pos = content.find(secret_value, line_end)
+    
+    def _search_commits(self, search_query: str):
+        """
+        搜索提交，每页只取需要检查的数量
+        
+        最多只检查前 MAX_COMMITS_TO_CHECK 个commits，按此大小请求第一页，
+        避免下载和解析用不到的结果
+        
+        Args:
+            search_query: 搜索查询
+            
+        Returns:
+            commits 搜索结果
+        """
+        per_page = self.github.per_page
+        self.github.per_page = self.MAX_COMMITS_TO_CHECK
+        try:
+            return self.github.search_commits(search_query)
+        finally:
+            self.github.per_page = per_page
+    
+    def _process_commit_results(self, search_results: Iterable[Commit], secret_value: str,
+                                max_results: int) -> List[Dict[str, Any]]:
         """处理提交搜索结果
         
         GitHub search_commits API会返回提交消息或差异中包含密钥的commits。
@@ -374,16 +958,34 @@ class GitHubScanner:
         count = 0
         processed = 0
         
-        print(f"  ℹ️  开始处理commits结果...")
+        logger.info("  ℹ️  开始处理commits结果...")
+        
+        # 先收集待检查的commits，再并发获取完整的commit对象
+        candidates = list(islice(search_results, self.MAX_COMMITS_TO_CHECK))
+        
+        # 第一页返回时已带回结果总数，此时读取 totalCount 不会再发起请求
+        total_count = getattr(search_results, 'totalCount', len(candidates)) if candidates else 0
+        if total_count > 0:
+            logger.info("  ℹ️  搜索API返回 %d 个commits，正在检查差异...", total_count)
+        if total_count > self.MAX_COMMITS_TO_CHECK:
+            logger.warning("  ⚠️  已达到最大处理数量(%d)，停止检查", self.MAX_COMMITS_TO_CHECK)
+        
+        # 每个涉及的仓库只获取一次仓库信息，之后每个commit只需一次请求
+        repo_names = []
+        for commit in candidates:
+            try:
+                repo_names.append(self._parse_commit_repo_name(commit))
+            except Exception:
+                continue
+        self._load_repo_infos(repo_names)
+        
+        details = self._run_concurrently(self._fetch_commit_details, candidates)
         
-        for commit in search_results:
+        for commit, detail in zip(candidates, details):
             if count >= max_results:
                 break
             
             processed += 1
-            if processed > 30:  # 最多检查30个commits
-                print(f"  ⚠️  已达到最大处理数量(30)，停止检查")
-                break
             
             try:
                 # GitHub search_commits 返回的对象可能没有 repository 属性
@@ -392,65 +994,65 @@ class GitHubScanner:
                 
                 # 从 html_url 提取仓库名: https://github.com/owner/repo/commit/sha
                 try:
-                    html_url = commit.html_url
-                    # 解析: https://github.com/owner/repo/commit/sha
-                    parts = html_url.replace('https://github.com/', '').split('/')
-                    repo_name = f"{parts[0]}/{parts[1]}"
-                except:
-                    print(f"     ❌ 无法解析仓库名")
+                    repo_name = self._parse_commit_repo_name(commit)
+                except Exception:
+                    logger.error("     ❌ 无法解析仓库名")
                     continue
                 
-                print(f"  📝 [{processed}] 检查 commit {commit_sha_short} ({repo_name})")
+                logger.info("  📝 [%d] 检查 commit %s (%s)", processed, commit_sha_short, repo_name)
                 
                 # 先检查消息中是否有密钥
                 commit_message = commit.commit.message if commit.commit and commit.commit.message else ""
                 found_in_message = secret_value in commit_message
                 
                 if found_in_message:
-                    print(f"     ✓ 在消息中找到密钥")
+                    logger.info("     ✓ 在消息中找到密钥")
                 
                 # 获取完整的commit对象以检查diff
                 found_in_diff = False
                 affected_files = []
                 
                 try:
-                    repo_obj = self.github.get_repo(repo_name)
-                    full_commit = repo_obj.get_commit(commit.sha)
+                    if isinstance(detail, Exception):
+                        raise detail
+                    repo_info, full_commit = detail
                     
                     # 检查每个文件的patch
-                    files_count = len(full_commit.files) if hasattr(full_commit, 'files') and full_commit.files else 0
-                    print(f"     📁 检查 {files_count} 个文件的差异...")
+                    files = getattr(full_commit, 'files', None) or []
+                    files_count = len(files)
+                    logger.info("     📁 检查 %d 个文件的差异...", files_count)
                     
                     if files_count > 0:
-                        for file in full_commit.files:
-                            file_name = file.filename if hasattr(file, 'filename') else 'unknown'
-                            
-                            if hasattr(file, 'patch') and file.patch:
-                                if secret_value in file.patch:
+                        # 二进制等文件没有patch，按空字符串处理
+                        patches = [getattr(file, 'patch', None) or '' for file in files]
+                        
+                        # 先在拼接后的全部差异中判断一次（密钥不含 NUL，不会跨文件误匹配），
+                        # 只有命中时才逐个文件定位
+                        if secret_value in '\x00'.join(patches):
+                            for file, patch in zip(files, patches):
+                                if secret_value in patch:
+                                    file_name = getattr(file, 'filename', None) or 'unknown'
                                     found_in_diff = True
                                     affected_files.append(file_name)
-                                    print(f"     ✓ 在文件 {file_name} 的差异中找到密钥")
+                                    logger.info("     ✓ 在文件 %s 的差异中找到密钥", file_name)
                     else:
-                        print(f"     ⚠️  此commit没有文件变更")
+                        logger.warning("     ⚠️  此commit没有文件变更")
                     
-                    # 获取仓库信息
-                    repo_url = repo_obj.html_url
-                    repo_owner = repo_obj.owner.login
-                    repo_description = repo_obj.description
-                    repo_updated_at = repo_obj.updated_at
-                    repo_stars = repo_obj.stargazers_count
-                        
                 except Exception as e:
-                    print(f"     ❌ 获取commit详情失败: {str(e)[:100]}")
+                    logger.error("     ❌ 获取commit详情失败: %s", str(e)[:100])
                     # 即使获取详情失败，如果消息中有密钥，也应该记录
                     if not found_in_message:
                         continue
-                    # 使用默认值
-                    repo_url = f"https://github.com/{repo_name}"
-                    repo_owner = repo_name.split('/')[0]
-                    repo_description = None
-                    repo_updated_at = None
-                    repo_stars = 0
+                    repo_info = None
+                
+                # 获取仓库信息（获取失败时使用默认值）
+                if repo_info is None:
+                    repo_info = self._default_repo_info(repo_name)
+                repo_url = repo_info['repo_url']
+                repo_owner = repo_info['repo_owner']
+                repo_description = repo_info['repo_description']
+                repo_updated_at = repo_info['repo_updated_at']
+                repo_stars = repo_info['repo_stars']
                 
                 # 如果在消息或差异中找到密钥，记录结果
                 if found_in_message or found_in_diff:
@@ -460,7 +1062,7 @@ class GitHubScanner:
                     if found_in_diff:
                         found_in.append('Diff')
                     
-                    print(f"     ✅ 找到泄露，位置: {' + '.join(found_in)}")
+                    logger.info("     ✅ 找到泄露，位置: %s", ' + '.join(found_in))
                     
                     result = {
                         'type': 'Commits',
@@ -487,17 +1089,91 @@ class GitHubScanner:
                     results.append(result)
                     count += 1
                 else:
-                    print(f"     ⚠️  未找到密钥（可能是误报）")
+                    logger.warning("     ⚠️  未找到密钥（可能是误报）")
                     
             except Exception as e:
-                print(f"     ❌ 处理commit时出错: {str(e)[:100]}")
+                logger.error("     ❌ 处理commit时出错: %s", str(e)[:100])
                 continue
         
-        print(f"  ℹ️  处理完成，共找到 {len(results)} 处泄露")
+        logger.info("  ℹ️  处理完成，共找到 %d 处泄露", len(results))
         return results
     
-    def _process_issue_results(self, search_results, secret_value: str, max_results: int, 
-                              only_issues: bool = False, only_pr: bool = False) -> List[Dict]:
+    @staticmethod
+    def _parse_commit_repo_name(commit: Commit) -> str:
+        """从 commit 的 html_url 提取仓库名: https://github.com/owner/repo/commit/sha"""
+        parts = commit.html_url.replace('https://github.com/', '').split('/')
+        return f"{parts[0]}/{parts[1]}"
+    
+    def _load_repo_infos(self, repo_names: List[str]):
+        """并发获取尚未缓存的仓库信息（每个仓库只请求一次）"""
+        pending = [name for name in dict.fromkeys(repo_names) if name not in self._repo_info_cache]
+        self._run_concurrently(self._load_repo_info, pending)
+    
+    def _get_repo_info(self, repo_name: str) -> Dict:
+        """获取已缓存的仓库信息，获取失败的仓库使用默认值"""
+        return self._repo_info_cache.get(repo_name) or self._default_repo_info(repo_name)
+    
+    def _load_repo_info(self, repo_name: str) -> Dict:
+        """获取并缓存仓库信息（在线程池中执行）"""
+        repo_obj = self._get_thread_github().get_repo(repo_name)
+        return self._cache_repo_info(repo_name, repo_obj)
+    
+    def _fetch_commit_details(self, commit: Commit) -> Tuple[Optional[Dict], Commit]:
+        """
+        获取完整的commit对象（在线程池中执行）
+        
+        直接请求 /repos/{owner}/{repo}/commits/{sha}，返回结果已包含各文件的patch；
+        仓库信息由 _load_repo_info 预先按仓库获取
+        
+        Args:
+            commit: search_commits 返回的commit
+            
+        Returns:
+            (仓库信息字典或None, 完整的commit对象)
+        """
+        repo_name = self._parse_commit_repo_name(commit)
+        
+        # lazy=True 不会发起请求，只用于构造 commit 的请求地址
+        repo_obj = self._get_thread_github().get_repo(repo_name, lazy=True)
+        return self._repo_info_cache.get(repo_name), repo_obj.get_commit(commit.sha)
+    
+    @staticmethod
+    def _default_repo_info(repo_name: str) -> Dict:
+        """仓库信息获取失败时使用的默认值"""
+        return {
+            'repo_url': f"https://github.com/{repo_name}",
+            'repo_owner': repo_name.split('/')[0],
+            'repo_description': None,
+            'repo_updated_at': None,
+            'repo_stars': 0,
+        }
+    
+    def _cache_repo_info(self, repo_name: str, repo_obj: Repository) -> Dict:
+        """
+        提取并缓存报告所需的仓库信息
+        
+        只缓存普通字典而不缓存 Repository 对象：对象绑定了创建它的线程的连接，
+        不能在其他线程中复用
+        
+        Args:
+            repo_name: 仓库全名 (owner/repo)，作为缓存键
+            repo_obj: 仓库对象
+            
+        Returns:
+            仓库信息字典
+        """
+        repo_info = {
+            'repo_url': repo_obj.html_url,
+            'repo_owner': repo_obj.owner.login,
+            'repo_description': repo_obj.description,
+            'repo_updated_at': repo_obj.updated_at,
+            'repo_stars': repo_obj.stargazers_count,
+        }
+        self._repo_info_cache[repo_name] = repo_info
+        return repo_info
+    
+    def _process_issue_results(self, search_results: Iterable[Issue], secret_value: str, max_results: int,
+                              only_issues: bool = False, only_pr: bool = False) -> List[Dict[str, Any]]:
         """处理议题/PR搜索结果
         
         Args:
@@ -516,7 +1192,8 @@ class GitHubScanner:
             
             try:
                 # 判断是 Issue 还是 Pull Request
-                is_pr = issue.pull_request is not None
+                # （普通Issue的搜索结果不含 pull_request 字段，访问该属性会额外请求一次）
+                is_pr = '/pull/' in issue.html_url
                 issue_type = 'Pull Request' if is_pr else 'Issue'
                 
                 # 根据过滤条件跳过
@@ -532,10 +1209,11 @@ class GitHubScanner:
                 if issue.body and secret_value in issue.body:
                     found_in.append('内容')
                 
+                # issue.repository 未随搜索结果返回，访问时会逐个请求，仓库名从API地址解析
+                repo_name = '/'.join(issue.url.split('/')[-4:-2])
                 results.append({
                     'type': issue_type,
-                    'repo_name': issue.repository.full_name,
-                    'repo_url': issue.repository.html_url,
+                    'repo_name': repo_name,
                     'issue_number': issue.number,
                     'issue_url': issue.html_url,
                     'file_url': issue.html_url,  # 使用issue_url作为file_url
@@ -547,10 +1225,6 @@ class GitHubScanner:
                     'found_in': ', '.join(found_in) if found_in else '内容',
                     'created_at': issue.created_at,
                     'author': issue.user.login if issue.user else '未知',
-                    'repo_owner': issue.repository.owner.login,
-                    'repo_description': issue.repository.description,
-                    'repo_updated_at': issue.repository.updated_at,
-                    'repo_stars': issue.repository.stargazers_count,
                 })
                 count += 1
             
@@ -558,4 +1232,9 @@ class GitHubScanner:
                 # 跳过处理失败的议题
                 continue
         
+        # 每个仓库只请求一次仓库信息
+        self._load_repo_infos([result['repo_name'] for result in results])
+        for result in results:
+            result.update(self._get_repo_info(result['repo_name']))
+        
         return results
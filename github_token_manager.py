@@ -5,64 +5,252 @@ GitHub Token 管理器
 实现多Token轮询机制以提高API调用效率
 """
 
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import requests
+from config import TOKEN_STATE_FILE, GITHUB_TOKEN_START_INDEX, ALL_GITHUB_TOKENS
+
+
+logger = logging.getLogger(__name__)
 
 
 class GitHubTokenManager:
     """GitHub Token 管理器，支持多Token轮询"""
     
-    def __init__(self, tokens: List[str]):
+    # 搜索配额低于此值的Token视为不可用（与扫描器主动切换Token的阈值一致）
+    MIN_SEARCH_REMAINING = 2
+    
+    def __init__(self, tokens: List[str], start_index: int = GITHUB_TOKEN_START_INDEX):
         """
         初始化Token管理器
         
         Args:
             tokens: GitHub Token列表
+            start_index: 起始Token序号（超出范围时取模）
         """
         if not tokens or not any(tokens):
             raise ValueError("至少需要提供一个有效的GitHub Token")
         
         # 过滤空token
         self.tokens = [t.strip() for t in tokens if t and t.strip()]
-        self.current_index = 0
+        self.current_index = start_index % max(len(self.tokens), 1)
+        
+        # 多个扫描线程共享同一个管理器，选择Token和更新配额时加锁
+        self._lock = threading.RLock()
+        
+        # 扫描器池中正被某个扫描器使用的Token，切换时不会选中其他扫描器持有的Token
+        self._held_tokens = set()
         
         # 每个token的速率限制信息
         self.rate_limits: Dict[str, Dict] = {}
         
+        # 查询 /rate_limit 时复用同一个连接池，避免每次重新握手
+        self._session = requests.Session()
+        
         # 初始化所有token的速率信息
         for token in self.tokens:
             self.rate_limits[token] = {
-                'remaining': None,  # 剩余请求数
+                'remaining': None,  # 剩余请求数（搜索API，用于选择Token）
+                'search_remaining': None,  # 搜索API剩余请求数
+                'core_remaining': None,    # 核心API剩余请求数（与搜索API分开计算）
                 'reset_time': None,  # 重置时间
                 'limit': None,       # 总限制数
                 'last_check': None,  # 上次检查时间
                 'is_available': True  # 是否可用
             }
         
-        print(f"✅ GitHub Token管理器初始化成功，共加载 {len(self.tokens)} 个Token")
+        # 恢复上次运行时记录的、尚未重置的配额状态，退出时再保存
+        self._load_state()
+        atexit.register(self._save_state)
+        
+        logger.info("✅ GitHub Token管理器初始化成功，共加载 %s 个Token", len(self.tokens))
+    
+    @staticmethod
+    def _token_key(token: str) -> str:
+        """状态文件中的Token键（只保存哈希，不保存Token本身）"""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    def _load_state(self):
+        """从状态文件恢复尚未到重置时间的Token配额信息"""
+        try:
+            with open(TOKEN_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(state, dict):
+            return
+        
+        now = time.time()
+        for token in self.tokens:
+            saved = state.get(self._token_key(token))
+            if not isinstance(saved, dict):
+                continue
+            reset_time = saved.get('reset_time')
+            if not isinstance(reset_time, (int, float)) or reset_time <= now:
+                continue
+            info = self.rate_limits[token]
+            info['remaining'] = saved.get('remaining')
+            info['search_remaining'] = saved.get('remaining')
+            info['limit'] = saved.get('limit')
+            info['reset_time'] = datetime.fromtimestamp(reset_time)
+            if info['remaining'] is not None:
+                info['is_available'] = info['remaining'] > self.MIN_SEARCH_REMAINING
+        
+        # 起始Token上次已耗尽时，直接从配额充足的Token开始
+        if not self.rate_limits[self.get_current_token()]['is_available']:
+            self.get_next_token()
+    
+    def _save_state(self):
+        """保存Token配额信息到状态文件（进程退出时调用）"""
+        state = {}
+        for token in self.tokens:
+            info = self.rate_limits[token]
+            if info['reset_time'] is None:
+                continue
+            state[self._token_key(token)] = {
+                'remaining': info['search_remaining'],
+                'limit': info['limit'],
+                'reset_time': info['reset_time'].timestamp(),
+            }
+        if not state:
+            return
+        
+        try:
+            # 状态文件可以是不带目录的文件名（dirname 为空时不创建目录）
+            state_dir = os.path.dirname(TOKEN_STATE_FILE)
+            if state_dir:
+                os.makedirs(state_dir, exist_ok=True)
+            tmp_path = TOKEN_STATE_FILE + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, TOKEN_STATE_FILE)
+        except OSError as e:
+            # 状态保存失败不影响扫描，只给出提示
+            logger.warning("⚠️  保存Token状态失败 (%s): %s", TOKEN_STATE_FILE, e)
     
     def get_current_token(self) -> str:
         """获取当前Token"""
         return self.tokens[self.current_index]
     
-    def get_next_token(self) -> str:
+    def hold_token(self, token: str):
+        """
+        登记扫描器正在使用的Token（扫描器池中每个扫描器各自持有一个Token）
+        
+        Args:
+            token: GitHub Token
+        """
+        with self._lock:
+            self._held_tokens.add(token)
+    
+    def release_token(self, token: str):
         """
-        获取下一个可用Token（循环轮询）
+        扫描器不再使用Token时释放登记
+        
+        Args:
+            token: GitHub Token
+        """
+        with self._lock:
+            self._held_tokens.discard(token)
+    
+    def get_next_token(self, current: Optional[str] = None) -> str:
+        """
+        获取下一个可用Token（按剩余配额选择）
         
         策略：
-        1. 简单轮询到下一个Token
-        2. 不检查配额，不等待
-        3. 让调用者决定是否需要等待（只有真正触发API错误时才等待）
+        1. 在可用Token中选择剩余搜索配额最多的，配额未知或已过重置时间的视为配额充足
+        2. 配额相同时按轮询顺序选择当前Token之后的Token
+        3. 所有Token都不可用时，返回最早重置的Token
+        4. 不等待，让调用者决定是否需要等待（只有真正触发API错误时才等待）
+        
+        逐个轮询会让所有Token的配额一起耗尽；优先使用配额充足的Token，
+        可以让已耗尽的Token有时间等到重置
+        
+        Args:
+            current: 调用方扫描器当前使用的Token（可选）。传入时从该Token之后轮询，
+                     并跳过其他扫描器持有的Token（见 hold_token），切换后改为持有新Token
         
         Returns:
-            下一个Token
+            下一个Token（其他Token都被占用时返回 current 本身）
         """
-        # 简单轮询到下一个Token
-        self.current_index = (self.current_index + 1) % len(self.tokens)
+        with self._lock:
+            if current is None or current not in self.rate_limits:
+                return self._select_next_token()
+            
+            self.current_index = self.tokens.index(current)
+            token = self._select_next_token(exclude=self._held_tokens - {current})
+            if current in self._held_tokens:
+                self._held_tokens.discard(current)
+                self._held_tokens.add(token)
+            return token
+    
+    def _select_next_token(self, exclude: frozenset = frozenset()) -> str:
+        """按 get_next_token 的策略选择下一个Token（调用者需持有锁，exclude 中的Token不参与选择）"""
+        now = datetime.now()
+        count = len(self.tokens)
+        # 从当前Token的下一个开始排列，max/min 遇到相同值时取靠前的，保证轮询顺序
+        order = [(self.current_index + offset) % count for offset in range(1, count + 1)]
+        order = [i for i in order if self.tokens[i] not in exclude]
+        
+        def is_available(index: int) -> bool:
+            info = self.rate_limits[self.tokens[index]]
+            return info['is_available'] or self._has_reset(info, now)
+        
+        def remaining(index: int) -> float:
+            info = self.rate_limits[self.tokens[index]]
+            if info['remaining'] is None or self._has_reset(info, now):
+                return float('inf')
+            return info['remaining']
+        
+        candidates = [i for i in order if is_available(i)]
+        if candidates:
+            self.current_index = max(candidates, key=remaining)
+        else:
+            self.current_index = min(
+                order,
+                key=lambda i: self.rate_limits[self.tokens[i]]['reset_time'] or datetime.max
+            )
         return self.tokens[self.current_index]
     
+    @staticmethod
+    def _has_reset(info: Dict, now: datetime) -> bool:
+        """Token的配额是否已过重置时间"""
+        return info['reset_time'] is not None and info['reset_time'] <= now
+    
+    def record_search_rate_limit(self, token: str, remaining: int,
+                                 limit: Optional[int] = None, reset_time: Optional[datetime] = None):
+        """
+        记录扫描器获知的搜索配额（供 get_next_token 选择Token）
+        
+        Args:
+            token: GitHub Token
+            remaining: 搜索API剩余请求数
+            limit: 搜索API总限制数（可选）
+            reset_time: 重置时间（可选，支持带时区的datetime）
+        """
+        if token not in self.rate_limits:
+            return
+        
+        with self._lock:
+            info = self.rate_limits[token]
+            info['remaining'] = remaining
+            info['search_remaining'] = remaining
+            if limit is not None:
+                info['limit'] = limit
+            if reset_time is not None:
+                # 统一为本地时间的naive datetime，与其他字段保持一致
+                info['reset_time'] = datetime.fromtimestamp(reset_time.timestamp())
+            info['last_check'] = datetime.now()
+            info['is_available'] = remaining > self.MIN_SEARCH_REMAINING
+    
     def update_rate_limit(self, token: str, response: requests.Response):
         """
         更新Token的速率限制信息
@@ -75,24 +263,21 @@ class GitHubTokenManager:
             return
         
         headers = response.headers
-        info = self.rate_limits[token]
-        
-        # 从响应头中获取速率限制信息
-        info['remaining'] = int(headers.get('X-RateLimit-Remaining', 0))
-        info['limit'] = int(headers.get('X-RateLimit-Limit', 5000))
-        
+        remaining = int(headers.get('X-RateLimit-Remaining', 0))
         reset_timestamp = headers.get('X-RateLimit-Reset')
-        if reset_timestamp:
-            info['reset_time'] = datetime.fromtimestamp(int(reset_timestamp))
+        reset_time = datetime.fromtimestamp(int(reset_timestamp)) if reset_timestamp else None
         
-        info['last_check'] = datetime.now()
+        # 只有搜索API的配额参与选择Token，核心API的配额单独记录，不覆盖搜索配额
+        if headers.get('X-RateLimit-Resource') != 'search':
+            with self._lock:
+                self.rate_limits[token]['core_remaining'] = remaining
+            return
         
-        # 如果剩余配额低于10，标记为不可用
-        if info['remaining'] < 10:
-            info['is_available'] = False
-            print(f"⚠️  Token配额不足 (剩余: {info['remaining']}), 切换到下一个Token")
-        else:
-            info['is_available'] = True
+        self.record_search_rate_limit(
+            token, remaining, int(headers.get('X-RateLimit-Limit', 30)), reset_time
+        )
+        if not self.rate_limits[token]['is_available']:
+            logger.warning("⚠️  Token配额不足 (剩余: %s), 切换到下一个Token", remaining)
     
     def check_rate_limit(self, token: str) -> Dict:
         """
@@ -111,25 +296,25 @@ class GitHubTokenManager:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self._session.get(url, headers=headers, timeout=10)
             if response.status_code == 200:
                 data = response.json()
-                search_limit = data.get('resources', {}).get('search', {})
-                
-                info = self.rate_limits[token]
-                info['remaining'] = search_limit.get('remaining', 0)
-                info['limit'] = search_limit.get('limit', 30)
+                resources = data.get('resources', {})
+                search_limit = resources.get('search', {})
                 
                 reset_timestamp = search_limit.get('reset')
-                if reset_timestamp:
-                    info['reset_time'] = datetime.fromtimestamp(reset_timestamp)
-                
-                info['last_check'] = datetime.now()
-                info['is_available'] = info['remaining'] > 10
+                self.record_search_rate_limit(
+                    token,
+                    search_limit.get('remaining', 0),
+                    search_limit.get('limit', 30),
+                    datetime.fromtimestamp(reset_timestamp) if reset_timestamp else None
+                )
                 
+                info = self.rate_limits[token]
+                info['core_remaining'] = resources.get('core', {}).get('remaining')
                 return info
         except Exception as e:
-            print(f"❌ 检查速率限制失败: {e}")
+            logger.error("❌ 检查速率限制失败: %s", e)
         
         return self.rate_limits.get(token, {})
     
@@ -140,17 +325,19 @@ class GitHubTokenManager:
         Returns:
             所有Token的速率限制信息
         """
-        for token in self.tokens:
-            self.check_rate_limit(token)
+        # 并发查询所有Token，耗时约为一次请求而不是 N 次
+        with ThreadPoolExecutor(max_workers=min(16, len(self.tokens))) as executor:
+            list(executor.map(self.check_rate_limit, self.tokens))
         
         return self.rate_limits
     
     def print_status(self):
         """打印所有Token的状态"""
-        print("\n" + "=" * 80)
-        print("GitHub Token 状态")
-        print("=" * 80)
+        logger.info("\n" + "=" * 80)
+        logger.info("GitHub Token 状态")
+        logger.info("=" * 80)
         
+        now = datetime.now()
         for idx, token in enumerate(self.tokens, 1):
             info = self.rate_limits[token]
             masked_token = token[:8] + "..." + token[-4:]
@@ -159,18 +346,18 @@ class GitHubTokenManager:
             remaining = info['remaining'] if info['remaining'] is not None else "未知"
             limit = info['limit'] if info['limit'] is not None else "未知"
             
-            print(f"\nToken {idx}: {masked_token}")
-            print(f"  状态: {status}")
-            print(f"  配额: {remaining}/{limit}")
+            logger.info("\nToken %s: %s", idx, masked_token)
+            logger.info("  状态: %s", status)
+            logger.info("  配额: %s/%s", remaining, limit)
             
             if info['reset_time']:
-                time_until_reset = (info['reset_time'] - datetime.now()).total_seconds()
+                time_until_reset = (info['reset_time'] - now).total_seconds()
                 if time_until_reset > 0:
-                    print(f"  重置: {time_until_reset/60:.1f} 分钟后")
+                    logger.info("  重置: %.1f 分钟后", time_until_reset/60)
                 else:
-                    print(f"  重置: 已重置")
+                    logger.info("  重置: 已重置")
         
-        print("=" * 80)
+        logger.info("=" * 80)
     
     def wait_if_needed(self, min_remaining: int = 10):
         """
@@ -183,12 +370,30 @@ class GitHubTokenManager:
         info = self.rate_limits[current_token]
         
         if info['remaining'] is not None and info['remaining'] < min_remaining:
-            print(f"⚠️  当前Token配额不足 (剩余: {info['remaining']})")
+            logger.warning("⚠️  当前Token配额不足 (剩余: %s)", info['remaining'])
             next_token = self.get_next_token()
             if next_token != current_token:
-                print(f"✅ 已切换到新Token")
+                logger.info("✅ 已切换到新Token")
             else:
-                print(f"⏳ 等待Token重置...")
+                logger.info("⏳ 等待Token重置...")
+    
+    def seconds_until_available(self) -> Optional[float]:
+        """
+        距离有Token可以继续搜索的秒数
+        
+        Returns:
+            已有可用Token时返回0；所有Token都已耗尽时返回最早重置的剩余秒数；
+            存在重置时间未知的已耗尽Token时返回None
+        """
+        now = datetime.now()
+        resets = []
+        for info in self.rate_limits.values():
+            if info['is_available'] or self._has_reset(info, now):
+                return 0.0
+            if info['reset_time'] is None:
+                return None
+            resets.append(info['reset_time'])
+        return max(0.0, (min(resets) - now).total_seconds())
     
     def get_available_token_count(self) -> int:
         """获取可用Token数量"""
@@ -204,44 +409,26 @@ def load_tokens_from_env() -> List[str]:
     - GITHUB_TOKENS: 多个token，用逗号分隔
     
     Returns:
-        Token列表
+        Token列表（已去空、去重，保持顺序）
     """
-    import os
-    from dotenv import load_dotenv
-    
-    load_dotenv()
-    
-    tokens = []
-    
-    # 尝试加载单个token
-    single_token = os.getenv('GITHUB_TOKEN', '').strip()
-    if single_token:
-        tokens.append(single_token)
-    
-    # 尝试加载多个tokens
-    multi_tokens = os.getenv('GITHUB_TOKENS', '').strip()
-    if multi_tokens:
-        tokens.extend([t.strip() for t in multi_tokens.split(',') if t.strip()])
-    
-    # 去重
-    tokens = list(dict.fromkeys(tokens))  # 保持顺序的去重
-    
-    return tokens
+    # config 导入时已完成 .env 解析、拆分和去重
+    return list(ALL_GITHUB_TOKENS)
 
 
 # 测试代码
 if __name__ == '__main__':
-    print("测试 GitHub Token 管理器")
-    print("=" * 80)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    logger.info("测试 GitHub Token 管理器")
+    logger.info("=" * 80)
     
     tokens = load_tokens_from_env()
     
     if not tokens:
-        print("❌ 未找到GitHub Token")
-        print("请在.env文件中配置:")
-        print("  GITHUB_TOKEN=your_token_here")
-        print("  或")
-        print("  GITHUB_TOKENS=token1,token2,token3")
+        logger.error("❌ 未找到GitHub Token")
+        logger.info("请在.env文件中配置:")
+        logger.info("  GITHUB_TOKEN=your_token_here")
+        logger.info("  或")
+        logger.info("  GITHUB_TOKENS=token1,token2,token3")
     else:
         manager = GitHubTokenManager(tokens)
         manager.get_all_rate_limits()
@@ -4,287 +4,273 @@
 HTML报告生成模块
 """
 import os
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
 from datetime import datetime
-from typing import List, Dict
+from string import Template
+from typing import Any, Callable, List, Dict
 from config import OUTPUT_DIR
 
 
-class HTMLReportGenerator:
-    """HTML扫描报告生成器"""
-    
-    def __init__(self, output_dir: str = OUTPUT_DIR):
-        """
-        初始化HTML报告生成器
-        
-        Args:
-            output_dir: 输出目录
-        """
-        self.output_dir = output_dir
-        self._ensure_output_dir()
-    
-    def _ensure_output_dir(self):
-        """确保输出目录存在"""
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-    
-    def generate_monitor_report(self,
-                                leakages: List[Dict],
-                                statistics: Dict,
-                                scan_start_time: datetime,
-                                secrets_file: str) -> str:
-        """
-        生成监控模式HTML报告
-        
-        Args:
-            leakages: 泄露列表
-            statistics: 统计信息
-            scan_start_time: 扫描开始时间
-            secrets_file: 密钥清单文件路径
-            
-        Returns:
-            报告文件路径
-        """
-        report_time = datetime.now()
-        timestamp = report_time.strftime("%Y%m%d_%H%M%S")
-        filename = f"monitor_report_{timestamp}.html"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        # 计算扫描耗时
-        duration = (report_time - scan_start_time).total_seconds()
-        duration_str = f"{int(duration // 60)}分{int(duration % 60)}秒" if duration >= 60 else f"{int(duration)}秒"
-        
-        # 生成HTML
-        html_content = self._generate_html(
-            leakages=leakages,
-            statistics=statistics,
-            scan_start_time=scan_start_time,
-            report_time=report_time,
-            duration_str=duration_str,
-            secrets_file=secrets_file
-        )
-        
-        # 写入文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        return filepath
-    
-    def _generate_html(self, leakages, statistics, scan_start_time, report_time, duration_str, secrets_file):
-        """生成HTML内容"""
-        
-        # 状态标识
-        if leakages:
-            status_class = "danger"
-            status_icon = "🚨"
-            status_text = "发现泄露"
-        else:
-            status_class = "success"
-            status_icon = "✅"
-            status_text = "安全"
-        
-        # 泄露详情HTML
-        leakages_html = self._generate_leakages_html(leakages)
-        
-        # 统计图表HTML
-        charts_html = self._generate_charts_html(statistics)
-        
-        html = f"""<!DOCTYPE html>
+@lru_cache(maxsize=32)
+def _basename(path: str) -> str:
+    """清单文件名（监控模式每轮都传入相同路径，结果按路径缓存）"""
+    return os.path.basename(path)
+
+
+# 各泄露类型对应的 (位置标签, 详情标签)
+_LEAK_TYPE_LABELS = {
+    'Code': ('文件', '行号'),
+    'Commits': ('提交', '位置'),
+    'Issue': ('议题', '位置'),
+    'Pull Request': ('Pull Request', '位置'),
+}
+_DEFAULT_LABELS = ('位置', '详情')
+
+# 未发现泄露时的提示
+_NO_LEAKAGE_HTML = """
+            <div class="section">
+                <div class="no-leakage">
+                    <div class="no-leakage-icon">✅</div>
+                    <div class="no-leakage-text">未发现密钥泄露</div>
+                    <div class="no-leakage-desc">您清单中的所有密钥都未在 GitHub 公开仓库中发现</div>
+                </div>
+            </div>
+            """
+
+# 每个泄露密钥卡片末尾的建议操作（同时闭合位置列表和卡片）
+_SUGGESTIONS_HTML = """
+                </div>
+                
+                <div class="suggestions">
+                    <h4>⚠️ 建议操作</h4>
+                    <ul>
+                        <li>立即轮换该密钥</li>
+                        <li>检查密钥使用日志，确认是否有异常访问</li>
+                        <li>联系仓库所有者删除泄露的代码</li>
+                        <li>考虑使用 GitHub 密钥扫描删除请求</li>
+                    </ul>
+                </div>
+            </div>
+            """
+
+# 单个泄露位置（str.format_map 模板）
+_LOCATION_TPL = '''
+                    <div class="location-item">
+                        <div><strong>位置 #{loc_idx}</strong></div>
+                        <div style="margin-top: 10px;">
+                            <strong>仓库:</strong> <a href="{file_url}" target="_blank">{repo_name}</a>
+                            {stars_html}
+                        </div>
+                        <div><strong>{location_label}:</strong> {file_path}</div>
+                        <div><strong>{detail_label}:</strong> {line_number}</div>
+                        <div class="code-block">{line_content_html}</div>
+                        <div><a href="{file_url}" target="_blank">查看完整代码 →</a></div>
+                    </div>
+                '''
+
+# 报告页面模板（导入时构造一次，生成报告时只替换变量部分）
+_HEADER_TPL = Template("""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>密钥泄露监控报告 - {report_time.strftime('%Y-%m-%d %H:%M:%S')}</title>
+    <title>密钥泄露监控报告 - $report_time</title>
     <style>
-        * {{
+""")
+
+# 报告样式（不含变量，直接写入，不参与模板替换）
+_STATIC_CSS = """        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             line-height: 1.6;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 10px;
             box-shadow: 0 10px 40px rgba(0,0,0,0.2);
             overflow: hidden;
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 40px;
             text-align: center;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 32px;
             margin-bottom: 10px;
-        }}
+        }
         
-        .header .subtitle {{
+        .header .subtitle {
             font-size: 16px;
             opacity: 0.9;
-        }}
+        }
         
-        .status-banner {{
+        .status-banner {
             padding: 30px;
             text-align: center;
             font-size: 24px;
             font-weight: bold;
-        }}
+        }
         
-        .status-banner.success {{
+        .status-banner.success {
             background: #d4edda;
             color: #155724;
-        }}
+        }
         
-        .status-banner.danger {{
+        .status-banner.danger {
             background: #f8d7da;
             color: #721c24;
-        }}
+        }
         
-        .content {{
+        .content {
             padding: 40px;
-        }}
+        }
         
-        .info-grid {{
+        .info-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
             gap: 20px;
             margin-bottom: 40px;
-        }}
+        }
         
-        .info-card {{
+        .info-card {
             background: #f8f9fa;
             padding: 20px;
             border-radius: 8px;
             border-left: 4px solid #667eea;
-        }}
+        }
         
-        .info-card .label {{
+        .info-card .label {
             color: #6c757d;
             font-size: 14px;
             margin-bottom: 5px;
-        }}
+        }
         
-        .info-card .value {{
+        .info-card .value {
             font-size: 24px;
             font-weight: bold;
             color: #333;
-        }}
+        }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin: 30px 0;
-        }}
+        }
         
-        .stat-box {{
+        .stat-box {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 25px;
             border-radius: 8px;
             text-align: center;
-        }}
+        }
         
-        .stat-box .number {{
+        .stat-box .number {
             font-size: 36px;
             font-weight: bold;
             margin-bottom: 5px;
-        }}
+        }
         
-        .stat-box .label {{
+        .stat-box .label {
             font-size: 14px;
             opacity: 0.9;
-        }}
+        }
         
-        .section {{
+        .section {
             margin: 40px 0;
-        }}
+        }
         
-        .section-title {{
+        .section-title {
             font-size: 24px;
             color: #333;
             margin-bottom: 20px;
             padding-bottom: 10px;
             border-bottom: 2px solid #667eea;
-        }}
+        }
         
-        .leakage-card {{
+        .leakage-card {
             background: white;
             border: 1px solid #e0e0e0;
             border-radius: 8px;
             padding: 25px;
             margin-bottom: 25px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .leakage-card:hover {{
+        .leakage-card:hover {
             box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-        }}
+        }
         
-        .leakage-header {{
+        .leakage-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 20px;
-        }}
+        }
         
-        .leakage-title {{
+        .leakage-title {
             font-size: 20px;
             font-weight: bold;
             color: #333;
-        }}
+        }
         
-        .risk-badge {{
+        .risk-badge {
             padding: 5px 15px;
             border-radius: 20px;
             font-size: 14px;
             font-weight: bold;
-        }}
+        }
         
-        .risk-high {{
+        .risk-high {
             background: #f8d7da;
             color: #721c24;
-        }}
+        }
         
-        .risk-medium {{
+        .risk-medium {
             background: #fff3cd;
             color: #856404;
-        }}
+        }
         
-        .risk-low {{
+        .risk-low {
             background: #d1ecf1;
             color: #0c5460;
-        }}
+        }
         
-        .leakage-detail {{
+        .leakage-detail {
             display: grid;
             grid-template-columns: 120px 1fr;
             gap: 10px;
             margin: 10px 0;
-        }}
+        }
         
-        .detail-label {{
+        .detail-label {
             font-weight: bold;
             color: #6c757d;
-        }}
+        }
         
-        .detail-value {{
+        .detail-value {
             color: #333;
             word-break: break-all;
-        }}
+        }
         
-        .code-block {{
+        .code-block {
             background: #f8f9fa;
             border-left: 4px solid #667eea;
             padding: 15px;
@@ -293,90 +279,92 @@ class HTMLReportGenerator:
             font-family: 'Courier New', monospace;
             font-size: 14px;
             overflow-x: auto;
-        }}
+        }
         
-        .locations {{
+        .locations {
             margin-top: 20px;
-        }}
+        }
         
-        .location-item {{
+        .location-item {
             background: #f8f9fa;
             padding: 15px;
             margin: 10px 0;
             border-radius: 4px;
             border-left: 3px solid #667eea;
-        }}
+        }
         
-        .suggestions {{
+        .suggestions {
             background: #fff3cd;
             border-left: 4px solid #ffc107;
             padding: 20px;
             margin: 20px 0;
             border-radius: 4px;
-        }}
+        }
         
-        .suggestions h4 {{
+        .suggestions h4 {
             margin-bottom: 10px;
             color: #856404;
-        }}
+        }
         
-        .suggestions ul {{
+        .suggestions ul {
             margin-left: 20px;
-        }}
+        }
         
-        .suggestions li {{
+        .suggestions li {
             margin: 5px 0;
             color: #856404;
-        }}
+        }
         
-        .footer {{
+        .footer {
             background: #f8f9fa;
             padding: 20px 40px;
             text-align: center;
             color: #6c757d;
             border-top: 1px solid #e0e0e0;
-        }}
+        }
         
-        a {{
+        a {
             color: #667eea;
             text-decoration: none;
-        }}
+        }
         
-        a:hover {{
+        a:hover {
             text-decoration: underline;
-        }}
+        }
         
-        .no-leakage {{
+        .no-leakage {
             text-align: center;
             padding: 60px 20px;
-        }}
+        }
         
-        .no-leakage-icon {{
+        .no-leakage-icon {
             font-size: 80px;
             margin-bottom: 20px;
-        }}
+        }
         
-        .no-leakage-text {{
+        .no-leakage-text {
             font-size: 24px;
             color: #28a745;
             margin-bottom: 10px;
-        }}
+        }
         
-        .no-leakage-desc {{
+        .no-leakage-desc {
             color: #6c757d;
             font-size: 16px;
-        }}
+        }
         
-        @media print {{
-            body {{
+        @media print {
+            body {
                 background: white;
                 padding: 0;
-            }}
-            .container {{
+            }
+            .container {
                 box-shadow: none;
-            }}
-        }}
-    </style>
+            }
+        }
+"""
+
+_BANNER_TPL = Template("""    </style>
 </head>
 <body>
     <div class="container">
@@ -385,11 +373,17 @@ class HTMLReportGenerator:
             <p class="subtitle">InCloud GitHub 密钥监控系统</p>
         </div>
         
-        <div class="status-banner {status_class}">
-            {status_icon} 扫描状态: {status_text}
+        <div class="status-banner $status_class">
+            $status_icon 扫描状态: $status_text
         </div>
         
-        <div class="content">
+""")
+
+# 两种状态横幅不含其他变量，导入时预先生成
+_DANGER_BANNER_HTML = _BANNER_TPL.substitute(status_class='danger', status_icon='🚨', status_text='发现泄露')
+_SUCCESS_BANNER_HTML = _BANNER_TPL.substitute(status_class='success', status_icon='✅', status_text='安全')
+
+_STATS_TPL = Template("""        <div class="content">
             <div class="section">
                 <div class="info-grid">
                     <div class="info-card">
@@ -398,15 +392,15 @@ class HTMLReportGenerator:
                     </div>
                     <div class="info-card">
                         <div class="label">清单文件</div>
-                        <div class="value" style="font-size: 16px;">{os.path.basename(secrets_file)}</div>
+                        <div class="value" style="font-size: 16px;">$secrets_file</div>
                     </div>
                     <div class="info-card">
                         <div class="label">扫描时间</div>
-                        <div class="value" style="font-size: 18px;">{scan_start_time.strftime('%Y-%m-%d %H:%M:%S')}</div>
+                        <div class="value" style="font-size: 18px;">$scan_start_time</div>
                     </div>
                     <div class="info-card">
                         <div class="label">扫描耗时</div>
-                        <div class="value">{duration_str}</div>
+                        <div class="value">$duration_str</div>
                     </div>
                 </div>
             </div>
@@ -415,64 +409,165 @@ class HTMLReportGenerator:
                 <h2 class="section-title">📊 扫描统计</h2>
                 <div class="stats-grid">
                     <div class="stat-box">
-                        <div class="number">{statistics['total_secrets']}</div>
+                        <div class="number">$total_secrets</div>
                         <div class="label">总密钥数量</div>
                     </div>
                     <div class="stat-box">
-                        <div class="number">{statistics['leaked_secrets']}</div>
+                        <div class="number">$leaked_secrets</div>
                         <div class="label">泄露密钥数</div>
                     </div>
                     <div class="stat-box">
-                        <div class="number">{statistics['total_leakages']}</div>
+                        <div class="number">$total_leakages</div>
                         <div class="label">泄露位置数</div>
                     </div>
                     <div class="stat-box">
-                        <div class="number">{statistics['leakage_rate']:.1f}%</div>
+                        <div class="number">$leakage_rate%</div>
                         <div class="label">泄露率</div>
                     </div>
                     <div class="stat-box">
-                        <div class="number">{statistics['unique_repos']}</div>
+                        <div class="number">$unique_repos</div>
                         <div class="label">涉及仓库</div>
                     </div>
                 </div>
             </div>
             
-            {charts_html}
-            
-            {leakages_html}
+            """)
+
+_FOOTER_TPL = Template("""
         </div>
         
         <div class="footer">
-            <p>报告生成时间: {report_time.strftime('%Y年%m月%d日 %H:%M:%S')}</p>
+            <p>报告生成时间: $report_time_cn</p>
             <p style="margin-top: 10px; color: #999;">SecretGuard © 2025</p>
         </div>
     </div>
 </body>
-</html>"""
-        return html
+</html>""")
+
+
+class HTMLReportGenerator:
+    """HTML扫描报告生成器"""
+    
+    def __init__(self, output_dir: str = OUTPUT_DIR):
+        """
+        初始化HTML报告生成器
+        
+        Args:
+            output_dir: 输出目录
+        """
+        self.output_dir = output_dir
+        self._ensure_output_dir()
+    
+    def _ensure_output_dir(self):
+        """确保输出目录存在"""
+        os.makedirs(self.output_dir, exist_ok=True)
+    
+    def generate_monitor_report(self,
+                                leakages: List[Dict],
+                                statistics: Dict,
+                                scan_start_time: datetime,
+                                secrets_file: str) -> str:
+        """
+        生成监控模式HTML报告
+        
+        Args:
+            leakages: 泄露列表
+            statistics: 统计信息
+            scan_start_time: 扫描开始时间
+            secrets_file: 密钥清单文件路径
+            
+        Returns:
+            报告文件路径
+        """
+        report_time = datetime.now()
+        timestamp = report_time.strftime("%Y%m%d_%H%M%S")
+        filename = f"monitor_report_{timestamp}.html"
+        filepath = os.path.join(self.output_dir, filename)
+        
+        # 计算扫描耗时
+        duration = (report_time - scan_start_time).total_seconds()
+        duration_str = f"{int(duration // 60)}分{int(duration % 60)}秒" if duration >= 60 else f"{int(duration)}秒"
+        
+        # 边生成边写入文件，不在内存中拼出完整的HTML
+        # 各片段自行编码为 UTF-8 后写入二进制缓冲，不经过文本层的分块编码
+        # 1 MiB 写缓冲：报告通常小于 1 MiB，关闭文件时一次系统调用写入磁盘
+        with open(filepath, 'wb', buffering=1 << 20) as f:
+            self._generate_html(
+                lambda text: f.write(text.encode('utf-8')),
+                leakages=leakages,
+                statistics=statistics,
+                scan_start_time=scan_start_time,
+                report_time=report_time,
+                duration_str=duration_str,
+                secrets_file=secrets_file
+            )
+        
+        return filepath
     
-    def _generate_leakages_html(self, leakages: List[Dict]) -> str:
-        """生成泄露详情HTML"""
+    def _generate_html(self, write: Callable[[str], Any], leakages, statistics, scan_start_time, report_time,
+                       duration_str, secrets_file):
+        """
+        生成HTML内容
+        
+        Args:
+            write: 输出函数（如文件对象的 write），各部分生成后依次写入
+        """
+        
+        # 报告中用到的时间各格式化一次
+        report_time_str = report_time.strftime('%Y-%m-%d %H:%M:%S')
+        report_time_cn = report_time.strftime('%Y年%m月%d日 %H:%M:%S')
+        scan_start_str = scan_start_time.strftime('%Y-%m-%d %H:%M:%S')
+        
+        write(_HEADER_TPL.substitute(
+            report_time=report_time_str,
+        ))
+        write(_STATIC_CSS)
+        # 状态标识
+        write(_DANGER_BANNER_HTML if leakages else _SUCCESS_BANNER_HTML)
+        write(_STATS_TPL.substitute(
+            secrets_file=_basename(secrets_file),
+            scan_start_time=scan_start_str,
+            duration_str=duration_str,
+            total_secrets=statistics['total_secrets'],
+            leaked_secrets=statistics['leaked_secrets'],
+            total_leakages=statistics['total_leakages'],
+            leakage_rate=f"{statistics['leakage_rate']:.1f}",
+            unique_repos=statistics['unique_repos'],
+        ))
+        if not leakages and not statistics.get('by_type'):
+            # 未发现泄露（监控时最常见的情况）：没有图表和详情，直接写入预先生成的提示
+            write('\n            \n            ')
+            write(_NO_LEAKAGE_HTML)
+        else:
+            # 统计图表HTML
+            self._generate_charts_html(write, statistics)
+            write('\n            \n            ')
+            
+            # 泄露详情HTML
+            self._generate_leakages_html(write, leakages)
+        write(_FOOTER_TPL.substitute(
+            report_time_cn=report_time_cn,
+        ))
+    
+    def _generate_leakages_html(self, write: Callable[[str], Any], leakages: List[Dict]):
+        """
+        生成泄露详情HTML并写入 write
+        
+        Args:
+            write: 输出函数
+            leakages: 泄露列表。除 GitHubScanner 生成的字段（type、repo_stars 等总是存在）外，
+                      还需包含 LeakageMonitor 补充的 secret_*、line_content_html 字段
+        """
         if not leakages:
-            return """
-            <div class="section">
-                <div class="no-leakage">
-                    <div class="no-leakage-icon">✅</div>
-                    <div class="no-leakage-text">未发现密钥泄露</div>
-                    <div class="no-leakage-desc">您清单中的所有密钥都未在 GitHub 公开仓库中发现</div>
-                </div>
-            </div>
-            """
+            write(_NO_LEAKAGE_HTML)
+            return
         
         # 按密钥分组
-        grouped = {}
+        grouped = defaultdict(list)
         for leakage in leakages:
-            secret_value = leakage['secret_value']
-            if secret_value not in grouped:
-                grouped[secret_value] = []
-            grouped[secret_value].append(leakage)
+            grouped[leakage['secret_value']].append(leakage)
         
-        html_parts = ['<div class="section">', '<h2 class="section-title">🚨 泄露详情</h2>']
+        write('<div class="section">\n<h2 class="section-title">🚨 泄露详情</h2>\n')
         
         for idx, (secret_value, secret_leakages) in enumerate(grouped.items(), 1):
             first_leakage = secret_leakages[0]
@@ -481,7 +576,7 @@ class HTMLReportGenerator:
             risk_level = "高风险"
             risk_class = "risk-high"
             
-            html_parts.append(f'''
+            write(f'''
             <div class="leakage-card">
                 <div class="leakage-header">
                     <div class="leakage-title">[{idx}] {first_leakage['secret_type_display']}</div>
@@ -511,67 +606,38 @@ class HTMLReportGenerator:
             
             for loc_idx, leakage in enumerate(secret_leakages, 1):
                 # 根据类型显示不同的标签
-                leak_type = leakage.get('type', 'Code')
-                if leak_type == 'Code':
-                    location_label = '文件'
-                    detail_label = '行号'
-                elif leak_type == 'Commits':
-                    location_label = '提交'
-                    detail_label = '位置'
-                elif leak_type == 'Issue':
-                    location_label = '议题'
-                    detail_label = '位置'
-                elif leak_type == 'Pull Request':
-                    location_label = 'Pull Request'
-                    detail_label = '位置'
-                else:
-                    location_label = '位置'
-                    detail_label = '详情'
+                location_label, detail_label = _LEAK_TYPE_LABELS.get(leakage['type'], _DEFAULT_LABELS)
+                stars = leakage['repo_stars']
+                stars_html = f" ⭐ {stars}" if stars else ''
                 
-                html_parts.append(f'''
-                    <div class="location-item">
-                        <div><strong>位置 #{loc_idx}</strong></div>
-                        <div style="margin-top: 10px;">
-                            <strong>仓库:</strong> <a href="{leakage['file_url']}" target="_blank">{leakage['repo_name']}</a>
-                            {f" ⭐ {leakage['repo_stars']}" if leakage.get('repo_stars', 0) > 0 else ''}
-                        </div>
-                        <div><strong>{location_label}:</strong> {leakage['file_path']}</div>
-                        <div><strong>{detail_label}:</strong> {leakage['line_number']}</div>
-                        <div class="code-block">{self._escape_html(leakage['line_content'][:150])}</div>
-                        <div><a href="{leakage['file_url']}" target="_blank">查看完整代码 →</a></div>
-                    </div>
-                ''')
+                write(_LOCATION_TPL.format_map({
+                    'loc_idx': loc_idx,
+                    'file_url': leakage['file_url'],
+                    'repo_name': leakage['repo_name'],
+                    'stars_html': stars_html,
+                    'location_label': location_label,
+                    'file_path': leakage['file_path'],
+                    'detail_label': detail_label,
+                    'line_number': leakage['line_number'],
+                    'line_content_html': leakage['line_content_html'],
+                }))
             
-            html_parts.append('''
-                </div>
-                
-                <div class="suggestions">
-                    <h4>⚠️ 建议操作</h4>
-                    <ul>
-                        <li>立即轮换该密钥</li>
-                        <li>检查密钥使用日志，确认是否有异常访问</li>
-                        <li>联系仓库所有者删除泄露的代码</li>
-                        <li>考虑使用 GitHub 密钥扫描删除请求</li>
-                    </ul>
-                </div>
-            </div>
-            ''')
+            write(_SUGGESTIONS_HTML)
         
-        html_parts.append('</div>')
-        return '\n'.join(html_parts)
+        write('</div>')
     
-    def _generate_charts_html(self, statistics: Dict) -> str:
-        """生成统计图表HTML"""
+    def _generate_charts_html(self, write: Callable[[str], Any], statistics: Dict):
+        """生成统计图表HTML并写入 write"""
         if not statistics.get('by_type'):
-            return ''
+            return
         
-        html_parts = ['<div class="section">', '<h2 class="section-title">📈 密钥类型分布</h2>']
-        html_parts.append('<div style="background: #f8f9fa; padding: 20px; border-radius: 8px;">')
+        write('<div class="section">\n<h2 class="section-title">📈 密钥类型分布</h2>\n')
+        write('<div style="background: #f8f9fa; padding: 20px; border-radius: 8px;">\n')
         
-        for secret_type, info in sorted(statistics['by_type'].items(), key=lambda x: x[1]['count'], reverse=True):
-            count = info['count']
-            display_name = info['display_name']
-            html_parts.append(f'''
+        # 先取出 (数量, 显示名称)，按数量排序时不再逐个访问嵌套字典
+        rows = [(info['count'], info['display_name']) for info in statistics['by_type'].values()]
+        for count, display_name in sorted(rows, key=itemgetter(0), reverse=True):
+            write(f'''
             <div style="margin: 15px 0;">
                 <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
                     <span>{display_name}</span>
@@ -583,17 +649,7 @@ class HTMLReportGenerator:
             </div>
             ''')
         
-        html_parts.append('</div></div>')
-        return '\n'.join(html_parts)
-    
-    def _escape_html(self, text: str) -> str:
-        """转义HTML特殊字符"""
-        return (text
-                .replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('"', '&quot;')
-                .replace("'", '&#39;'))
+        write('</div></div>')
     
     def generate_monitor_summary(self, 
                                  report_path: str, 
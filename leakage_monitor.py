@@ -2,12 +2,23 @@
 泄露监控模块
 用于监控指定密钥清单是否泄露到GitHub
 """
+import heapq
+import logging
+import queue
+import threading
 import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Sized
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from html import escape
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from github_scanner import GitHubScanner
 from secrets_list import SecretsListLoader, SecretItem, get_type_display_name
-from config import SEARCH_DELAY_PER_SECRET, MAX_RESULTS_PER_SECRET
+from config import MAX_RESULTS_PER_SECRET, SEARCH_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
 
 
 class LeakageMonitor:
@@ -33,7 +44,7 @@ class LeakageMonitor:
         self.whitelist_manager = whitelist_manager
         self.secrets_loader = SecretsListLoader()
         self.secrets: List[SecretItem] = []
-        self.search_delay = SEARCH_DELAY_PER_SECRET if not token_manager else 0.5  # 多Token时缩短延迟
+        self.total_secrets = 0  # 密钥总数（逐行扫描时在扫描完成后更新）
         self.max_results = MAX_RESULTS_PER_SECRET
         self.search_types = search_types or ['code']  # 默认只搜索代码
         self.api_call_count = 0  # API调用计数
@@ -41,121 +52,318 @@ class LeakageMonitor:
         if secrets_file:
             self.load_secrets(secrets_file)
     
-    def load_secrets(self, secrets_file: str):
+    def load_secrets(self, secrets_file: str, loading: Optional[Future] = None):
         """
         加载密钥清单
         
         Args:
             secrets_file: 密钥清单文件路径
+            loading: 已在后台执行的 secrets_loader.load_from_file 任务（可选），
+                传入时直接使用其结果，不再重复解析
         """
-        print(f"📂 加载密钥清单: {secrets_file}")
-        self.secrets = self.secrets_loader.load_from_file(secrets_file)
+        logger.info("📂 加载密钥清单: %s", secrets_file)
+        if loading is not None:
+            self.secrets = loading.result()
+        else:
+            self.secrets = self.secrets_loader.load_from_file(secrets_file)
+        self.total_secrets = len(self.secrets)
         self.secrets_loader.print_summary()
     
-    def scan_all_secrets(self) -> List[Dict]:
+    def scan_all_secrets(self, secrets: Optional[Iterable[SecretItem]] = None) -> List[Dict]:
         """
         扫描清单中的所有密钥
         
+        Args:
+            secrets: 要扫描的密钥（可选，默认为已加载的清单）；可以传入
+                SecretsListLoader.iter_from_file() 的迭代器，边解析边扫描
+        
         Returns:
             泄露信息列表
         """
-        if not self.secrets:
-            print("❌ 密钥清单为空，请先加载密钥清单")
-            return []
+        if secrets is None:
+            if not self.secrets:
+                logger.error("❌ 密钥清单为空，请先加载密钥清单")
+                return []
+            secrets = self.secrets
+        
+        # 同一个密钥值只搜索一次（迭代器无法预知总数，进度中只显示序号）
+        unique_count = len({(s.secret_value, s.exclude_pattern) for s in secrets}) if isinstance(secrets, Sized) else None
         
-        print(f"\n🔍 开始监控 {len(self.secrets)} 个密钥...")
-        print("=" * 60)
+        if unique_count is None:
+            logger.info("\n🔍 开始监控密钥...")
+        else:
+            logger.info("\n🔍 开始监控 %d 个密钥...", len(secrets))
+            if unique_count < len(secrets):
+                logger.info("   重复密钥只搜索一次，共需搜索 %d 个", unique_count)
+        logger.info("=" * 60)
+        
+        # 每个Token一个扫描器，各自消耗自己的搜索配额；
+        # 工作线程从池中取出扫描器独占使用，多Token时吞吐量随Token数增加
+        scanner_pool = self._create_scanner_pool()
+        progress = {'checked': 0}
+        progress_lock = threading.Lock()
+        
+        def scan(batch: List[SecretItem]) -> List[List[Dict]]:
+            for secret_item in batch:
+                with progress_lock:
+                    progress['checked'] += 1
+                    idx = progress['checked']
+                position = f"{idx}/{unique_count}" if unique_count is not None else str(idx)
+                # 每个密钥的信息作为一条日志输出，多个线程并发扫描时不会被其他输出打断
+                if secret_item.note:
+                    logger.info("\n[%s] 检查密钥: %s\n  密钥值: %s\n  备注: %s",
+                                position, secret_item.display_name, secret_item.masked, secret_item.note)
+                else:
+                    logger.info("\n[%s] 检查密钥: %s\n  密钥值: %s",
+                                position, secret_item.display_name, secret_item.masked)
+            
+            # 搜索频率由扫描器的令牌桶按配额控制，不需要固定延迟
+            scanner = scanner_pool.get()
+            try:
+                return self.scan_batch(batch, scanner)
+            finally:
+                scanner_pool.put(scanner)
         
+        worker_count = scanner_pool.qsize()
+        # {(密钥值, 排除规则): 重复出现的密钥项}，排除规则不同的密钥项各自过滤结果，分开搜索
+        duplicates: Dict[Tuple[str, str], List[SecretItem]] = {}
+        results: Dict[Tuple[str, str], List[Dict]] = {}
+        total_count = 0
+        
+        def collect():
+            keys, future = pending.popleft()
+            results.update(zip(keys, future.result()))
+        
+        try:
+            with ThreadPoolExecutor(max_workers=worker_count,
+                                    thread_name_prefix='secret-scan') as executor:
+                # 每 SEARCH_BATCH_SIZE 个密钥合并为一个任务（代码搜索用 OR 合并为一次请求）；
+                # 按需提交任务，只保留少量待完成的任务，密钥来自迭代器时不会一次读入全部
+                pending = deque()
+                batch = []
+                for secret_item in secrets:
+                    total_count += 1
+                    key = (secret_item.secret_value, secret_item.exclude_pattern)
+                    if key in duplicates:
+                        duplicates[key].append(secret_item)
+                        continue
+                    duplicates[key] = []
+                    batch.append(secret_item)
+                    if len(batch) < SEARCH_BATCH_SIZE:
+                        continue
+                    pending.append(([(s.secret_value, s.exclude_pattern) for s in batch], executor.submit(scan, batch)))
+                    batch = []
+                    if len(pending) >= worker_count * 2:
+                        collect()
+                if batch:
+                    pending.append(([(s.secret_value, s.exclude_pattern) for s in batch], executor.submit(scan, batch)))
+                while pending:
+                    collect()
+        finally:
+            # 线程池退出时所有扫描器都已归还
+            self._release_scanner_pool(scanner_pool)
+        
+        # 按清单中首次出现的顺序汇总结果，重复的密钥项复用搜索结果
         all_leakages = []
-        total_count = len(self.secrets)
         found_count = 0
+        for key, leakages in results.items():
+            if not leakages:
+                continue
+            found_count += 1 + len(duplicates[key])
+            all_leakages.extend(leakages)
+            for secret_item in duplicates[key]:
+                all_leakages.extend(self._annotate_duplicate(leakages, secret_item))
+        self.total_secrets = total_count
         
-        for idx, secret_item in enumerate(self.secrets, 1):
-            print(f"\n[{idx}/{total_count}] 检查密钥: {get_type_display_name(secret_item.secret_type)}")
-            print(f"  密钥值: {secret_item.mask_value()}")
-            if secret_item.note:
-                print(f"  备注: {secret_item.note}")
-            
-            # 搜索密钥泄露
-            leakages = self.scan_single_secret(secret_item)
-            
-            if leakages:
-                found_count += 1
-                all_leakages.extend(leakages)
+        logger.info("\n" + "=" * 60)
+        logger.info("✅ 扫描完成！")
+        logger.info("   总密钥数: %d", total_count)
+        logger.info("   发现泄露: %d 个密钥", found_count)
+        logger.info("   泄露位置: %d 处", len(all_leakages))
+        
+        return all_leakages
+    
+    @staticmethod
+    def _annotate_duplicate(leakages: List[Dict], secret_item: SecretItem) -> List[Dict]:
+        """
+        为重复出现的密钥项复制泄露记录，替换为该密钥项的类型和备注
+        
+        Args:
+            leakages: 首次出现的密钥项的泄露记录
+            secret_item: 重复出现的密钥项
             
-            # 延迟以避免API速率限制（最后一个不需要延迟）
-            if idx < total_count:
-                time.sleep(self.search_delay)
+        Returns:
+            泄露记录副本列表
+        """
+        return [
+            dict(
+                leakage,
+                secret_type=secret_item.secret_type,
+                secret_type_display=secret_item.display_name,
+                secret_masked=secret_item.masked,
+                secret_note=secret_item.note,
+            )
+            for leakage in leakages
+        ]
+    
+    def _create_scanner_pool(self) -> 'queue.Queue[GitHubScanner]':
+        """
+        创建扫描器池，Token管理器中的每个Token对应一个扫描器
         
-        print("\n" + "=" * 60)
-        print(f"✅ 扫描完成！")
-        print(f"   总密钥数: {total_count}")
-        print(f"   发现泄露: {found_count} 个密钥")
-        print(f"   泄露位置: {len(all_leakages)} 处")
+        Returns:
+            扫描器队列（未配置Token管理器时只包含主扫描器）
+        """
+        pool = queue.Queue()
+        pool.put(self.github_scanner)
+        if self.token_manager:
+            # 登记每个扫描器持有的Token，切换Token时只会选择没有被其他扫描器使用的Token
+            self.token_manager.hold_token(self.github_scanner.current_token)
+            for token in self.token_manager.tokens:
+                if token != self.github_scanner.current_token:
+                    self.token_manager.hold_token(token)
+                    pool.put(GitHubScanner(token, token_manager=self.token_manager))
+        return pool
+    
+    def _release_scanner_pool(self, pool: 'queue.Queue[GitHubScanner]'):
+        """
+        扫描结束后释放扫描器池登记的Token
         
-        return all_leakages
+        Args:
+            pool: _create_scanner_pool 创建的扫描器队列（所有扫描器均已归还）
+        """
+        if not self.token_manager:
+            return
+        while not pool.empty():
+            self.token_manager.release_token(pool.get().current_token)
     
-    def scan_single_secret(self, secret_item: SecretItem) -> List[Dict]:
+    def scan_single_secret(self, secret_item: SecretItem, scanner: Optional[GitHubScanner] = None) -> List[Dict]:
         """
         扫描单个密钥
         
         Args:
             secret_item: 密钥项
+            scanner: 使用的扫描器（可选，默认使用主扫描器）
             
         Returns:
             泄露信息列表
         """
-        # 主动检查搜索配额并切换Token（如果配置了token_manager）
-        if self.token_manager:
-            try:
-                rate_limit = self.github_scanner.github.get_rate_limit()
-                search_limit = rate_limit.search
-                
-                if search_limit.remaining <= 2:
-                    print(f"  ⚠️  当前Token配额不足 (剩余: {search_limit.remaining})")
-                    # 切换Token
-                    self.github_scanner.switch_token_if_needed()
-            except Exception as e:
-                pass  # 如果检查失败，继续执行
-        else:
-            # 没有token_manager，使用原来的等待逻辑
-            try:
-                rate_limit = self.github_scanner.github.get_rate_limit()
-                search_limit = rate_limit.search
-                
-                if search_limit.remaining <= 1:
-                    reset_seconds = (search_limit.reset - datetime.now()).total_seconds()
-                    if reset_seconds > 0:
-                        print(f"  ⏸️  搜索配额已用完 ({search_limit.remaining}/{search_limit.limit})")
-                        print(f"     主动等待 {int(reset_seconds + 5)} 秒后继续...")
-                        time.sleep(reset_seconds + 5)
-            except Exception:
-                pass
-        
-        leakages = self.github_scanner.search_secret_leakage(
+        scanner = scanner or self.github_scanner
+        self._check_search_quota(scanner)
+        
+        leakages = scanner.search_secret_leakage(
             secret_item.secret_value,
             max_results=self.max_results,
             search_types=self.search_types
         )
+        return self._process_leakages(secret_item, leakages)
+    
+    def scan_batch(self, batch: List[SecretItem], scanner: Optional[GitHubScanner] = None) -> List[List[Dict]]:
+        """
+        批量扫描多个密钥
+        
+        代码搜索把多个密钥用 OR 合并为一次请求，再按文件内容把命中归属到各个密钥
+        （见 GitHubScanner.search_secret_leakage_batch），搜索次数约为逐个扫描的 1/k
+        
+        Args:
+            batch: 密钥项列表
+            scanner: 使用的扫描器（可选，默认使用主扫描器）
+            
+        Returns:
+            与 batch 顺序一致的泄露信息列表
+        """
+        scanner = scanner or self.github_scanner
+        self._check_search_quota(scanner)
+        
+        found = scanner.search_secret_leakage_batch(
+            [secret_item.secret_value for secret_item in batch],
+            max_results=self.max_results,
+            search_types=self.search_types
+        )
+        
+        # 同一批的泄露共用一个扫描时间
+        scan_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        results = []
+        claimed = set()
+        for secret_item in batch:
+            leakages = found[secret_item.secret_value]
+            # 同一批中密钥值相同（排除规则不同）的密钥项各自使用一份副本
+            if secret_item.secret_value in claimed:
+                leakages = [dict(leakage) for leakage in leakages]
+            claimed.add(secret_item.secret_value)
+            results.append(self._process_leakages(secret_item, leakages, scan_time))
+        return results
+    
+    def _check_search_quota(self, scanner: GitHubScanner):
+        """
+        搜索前检查当前Token的搜索配额，不足时切换Token或等待重置
+        
+        按最近一次搜索响应头缓存的配额判断，不额外请求 /rate_limit
+        
+        Args:
+            scanner: 使用的扫描器
+        """
+        try:
+            search_limit = scanner.get_search_rate_limit()
+            if self.token_manager:
+                # 配额不足时切换Token（switch_token_if_needed 同样读取缓存的配额）
+                if search_limit['remaining'] <= 2:
+                    scanner.switch_token_if_needed()
+            elif search_limit['remaining'] <= 1:
+                # 没有token_manager，等待配额重置
+                # reset 是带时区的 UTC 时间，按时间戳计算剩余秒数
+                reset_seconds = search_limit['reset'].timestamp() - time.time()
+                if reset_seconds > 0:
+                    logger.info("  ⏸️  搜索配额已用完 (%s/%s)", search_limit['remaining'], search_limit['limit'])
+                    logger.info("     主动等待 %d 秒后继续...", reset_seconds + 5)
+                    time.sleep(reset_seconds + 5)
+        except Exception:
+            pass  # 如果检查失败，继续执行
+    
+    def _process_leakages(self, secret_item: SecretItem, leakages: List[Dict],
+                          scan_time: Optional[str] = None) -> List[Dict]:
+        """
+        过滤并标注一个密钥的搜索结果，发送钉钉告警
+        
+        Args:
+            secret_item: 密钥项
+            leakages: 该密钥的搜索结果
+            scan_time: 扫描时间字符串（可选，默认为当前时间）
+            
+        Returns:
+            泄露信息列表
+        """
+        if scan_time is None:
+            scan_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        # 先去掉路径匹配该密钥排除规则的泄露（如 node_modules/），不再参与白名单检查和告警
+        if secret_item.exclude_pattern:
+            leakages = [l for l in leakages if not secret_item.is_path_excluded(l['file_path'])]
         
         # 添加密钥信息到每个泄露记录
+        alerts = []
         for leakage in leakages:
             leakage['secret_type'] = secret_item.secret_type
-            leakage['secret_type_display'] = get_type_display_name(secret_item.secret_type)
+            leakage['secret_type_display'] = secret_item.display_name
             leakage['secret_value'] = secret_item.secret_value
-            leakage['secret_masked'] = secret_item.mask_value()
+            leakage['secret_masked'] = secret_item.masked
             leakage['secret_note'] = secret_item.note
-            leakage['scan_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            # 报告中展示的代码片段（截断并转义），只在此处计算一次
+            leakage['line_content_html'] = escape(leakage['line_content'][:150])
+            leakage['scan_time'] = scan_time
             
             # 检查白名单，只有不在白名单的泄露才发送钉钉告警
             if self.dingtalk_notifier:
                 # 如果配置了白名单，先检查
                 if self.whitelist_manager and self.whitelist_manager.enabled:
                     if not self.whitelist_manager.is_leakage_whitelisted(leakage):
-                        self.dingtalk_notifier.send_leakage_alert(leakage)
+                        alerts.append(leakage)
                 else:
                     # 没有白名单或白名单未启用，直接发送
-                    self.dingtalk_notifier.send_leakage_alert(leakage)
+                    alerts.append(leakage)
+        
+        # 同一个密钥的所有泄露合并为一次钉钉请求
+        if alerts:
+            self.dingtalk_notifier.send_leakage_alerts(alerts)
         
         return leakages
     
@@ -171,7 +379,7 @@ class LeakageMonitor:
         """
         if not leakages:
             return {
-                'total_secrets': len(self.secrets),
+                'total_secrets': self.total_secrets,
                 'leaked_secrets': 0,
                 'total_leakages': 0,
                 'leakage_rate': 0.0,
@@ -181,33 +389,25 @@ class LeakageMonitor:
             }
         
         # 统计泄露的密钥数（去重）
-        leaked_secrets = set()
-        by_type = {}
-        by_repo = {}
+        leaked_secrets = {leakage['secret_value'] for leakage in leakages}
         
-        for leakage in leakages:
-            leaked_secrets.add(leakage['secret_value'])
-            
-            # 按类型统计
-            secret_type = leakage['secret_type']
-            if secret_type not in by_type:
-                by_type[secret_type] = {
-                    'count': 0,
-                    'display_name': leakage['secret_type_display']
-                }
-            by_type[secret_type]['count'] += 1
-            
-            # 按仓库统计
-            repo_name = leakage['repo_name']
-            if repo_name not in by_repo:
-                by_repo[repo_name] = {
-                    'count': 0,
-                    'url': leakage['repo_url']
-                }
-            by_repo[repo_name]['count'] += 1
+        # 按类型和仓库计数（Counter 保持首次出现的顺序）
+        type_counts = Counter(map(itemgetter('secret_type'), leakages))
+        repo_counts = Counter(map(itemgetter('repo_name'), leakages))
+        # 反向遍历，同一仓库保留首次出现的链接
+        repo_urls = {leakage['repo_name']: leakage['repo_url'] for leakage in reversed(leakages)}
+        
+        by_type = {
+            secret_type: {'count': count, 'display_name': get_type_display_name(secret_type)}
+            for secret_type, count in type_counts.items()
+        }
+        by_repo = {
+            repo_name: {'count': count, 'url': repo_urls[repo_name]}
+            for repo_name, count in repo_counts.items()
+        }
         
         leaked_count = len(leaked_secrets)
-        total_secrets = len(self.secrets)
+        total_secrets = self.total_secrets
         leakage_rate = (leaked_count / total_secrets * 100) if total_secrets > 0 else 0
         
         return {
@@ -230,13 +430,10 @@ class LeakageMonitor:
         Returns:
             分组后的字典 {密钥值: [泄露位置列表]}
         """
-        grouped = {}
+        grouped = defaultdict(list)
         for leakage in leakages:
-            secret_value = leakage['secret_value']
-            if secret_value not in grouped:
-                grouped[secret_value] = []
-            grouped[secret_value].append(leakage)
-        return grouped
+            grouped[leakage['secret_value']].append(leakage)
+        return dict(grouped)
     
     def print_summary(self, leakages: List[Dict]):
         """
@@ -247,27 +444,28 @@ class LeakageMonitor:
         """
         stats = self.get_statistics(leakages)
         
-        print("\n" + "=" * 60)
-        print("📊 扫描摘要")
-        print("=" * 60)
-        print(f"总密钥数量: {stats['total_secrets']}")
-        print(f"泄露密钥数: {stats['leaked_secrets']}")
-        print(f"泄露位置数: {stats['total_leakages']}")
-        print(f"泄露率: {stats['leakage_rate']:.1f}%")
-        print(f"涉及仓库: {stats['unique_repos']}")
+        logger.info("\n" + "=" * 60)
+        logger.info("📊 扫描摘要")
+        logger.info("=" * 60)
+        logger.info("总密钥数量: %d", stats['total_secrets'])
+        logger.info("泄露密钥数: %d", stats['leaked_secrets'])
+        logger.info("泄露位置数: %d", stats['total_leakages'])
+        logger.info("泄露率: %.1f%%", stats['leakage_rate'])
+        logger.info("涉及仓库: %d", stats['unique_repos'])
         
         if stats['by_type']:
-            print(f"\n按类型统计:")
+            logger.info("\n按类型统计:")
             for secret_type, info in sorted(stats['by_type'].items()):
-                print(f"  - {info['display_name']}: {info['count']} 处")
+                logger.info("  - %s: %d 处", info['display_name'], info['count'])
         
         if stats['by_repo']:
-            print(f"\n泄露最多的仓库 (前5):")
-            sorted_repos = sorted(stats['by_repo'].items(), key=lambda x: x[1]['count'], reverse=True)
-            for repo_name, info in sorted_repos[:5]:
-                print(f"  - {repo_name}: {info['count']} 处")
+            logger.info("\n泄露最多的仓库 (前5):")
+            # 只需要前5个，不对全部仓库排序
+            top_repos = heapq.nlargest(5, stats['by_repo'].items(), key=lambda x: x[1]['count'])
+            for repo_name, info in top_repos:
+                logger.info("  - %s: %d 处", repo_name, info['count'])
         
-        print("=" * 60)
+        logger.info("=" * 60)
 
 
 class LeakageResult:
@@ -289,14 +487,28 @@ class LeakageResult:
         """是否发现泄露"""
         return len(self.leakages) > 0
     
-    def get_critical_leakages(self) -> List[Dict]:
+    def get_critical_leakages(self) -> Iterator[Dict]:
         """
         获取高危泄露（star数高的公开仓库）
         
+        按需逐条返回，只需要前几条或计数时不会复制整个列表
+        
+        Returns:
+            高危泄露迭代器
+        """
+        return (l for l in self.leakages if l.get('repo_stars', 0) > 10)
+    
+    def top_critical_leakages(self, n: int = 5) -> List[Dict]:
+        """
+        获取star数最高的前 n 处泄露
+        
+        Args:
+            n: 返回数量
+            
         Returns:
-            高危泄露列表
+            按star数从高到低排列的泄露列表
         """
-        return [l for l in self.leakages if l.get('repo_stars', 0) > 10]
+        return heapq.nlargest(n, self.leakages, key=lambda l: l.get('repo_stars', 0))
     
     def to_dict(self) -> Dict:
         """转换为字典"""
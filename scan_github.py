@@ -4,11 +4,15 @@ SecretGuard - GitHub 密钥泄露监控系统
 用于监控指定密钥清单中的密钥是否泄露到 GitHub 公开仓库
 """
 import argparse
+import logging
 import sys
 import os
 from datetime import datetime
 from config import GITHUB_TOKEN, ALL_GITHUB_TOKENS
-from scanner import CloudScanner
+from scanner import CloudScanner, setup_logging
+
+
+logger = logging.getLogger(__name__)
 
 
 def print_banner():
@@ -30,23 +34,23 @@ def print_banner():
 def validate_github_token() -> bool:
     """验证GitHub Token是否存在"""
     if not ALL_GITHUB_TOKENS:
-        print("❌ 错误: 未找到 GitHub Token")
-        print("\n请按以下步骤设置：")
-        print("1. 复制 env.example 为 .env")
-        print("2. 在 https://github.com/settings/tokens 创建 Personal Access Token")
-        print("3. 将 Token 添加到 .env 文件中:")
-        print("   GITHUB_TOKEN=your_token_here")
-        print("   或配置多个Token（推荐）:")
-        print("   GITHUB_TOKENS=token1,token2,token3")
+        logger.error("❌ 错误: 未找到 GitHub Token")
+        logger.info("\n请按以下步骤设置：")
+        logger.info("1. 复制 env.example 为 .env")
+        logger.info("2. 在 https://github.com/settings/tokens 创建 Personal Access Token")
+        logger.info("3. 将 Token 添加到 .env 文件中:")
+        logger.info("   GITHUB_TOKEN=your_token_here")
+        logger.info("   或配置多个Token（推荐）:")
+        logger.info("   GITHUB_TOKENS=token1,token2,token3")
         return False
     
     # 显示加载的Token数量
     token_count = len(ALL_GITHUB_TOKENS)
     if token_count > 1:
-        print(f"✅ 已加载 {token_count} 个 GitHub Token")
+        logger.info("✅ 已加载 %s 个 GitHub Token", token_count)
     else:
-        print(f"✅ 已加载 1 个 GitHub Token")
-        print(f"💡 提示: 配置多个Token可以提高扫描速度")
+        logger.info("✅ 已加载 1 个 GitHub Token")
+        logger.info("💡 提示: 配置多个Token可以提高扫描速度")
     
     return True
 
@@ -54,6 +58,7 @@ def validate_github_token() -> bool:
 def main():
     """主函数"""
     print_banner()
+    setup_logging()
     
     # 创建命令行参数解析器
     parser = argparse.ArgumentParser(
@@ -142,16 +147,14 @@ def main():
         # 执行监控
         report_path = scanner.scan_secrets_list(args.secrets_list, search_types=args.search_types)
         
-        print(f"\n✅ 扫描完成！")
-        print(f"📄 报告已保存至: {report_path}")
+        logger.info("\n✅ 扫描完成！")
+        logger.info("📄 报告已保存至: %s", report_path)
         
     except KeyboardInterrupt:
-        print("\n\n⚠️  用户中断扫描")
+        logger.warning("\n\n⚠️  用户中断扫描")
         sys.exit(0)
     except Exception as e:
-        print(f"\n❌ 扫描过程中发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("\n❌ 扫描过程中发生错误: %s", e)
         sys.exit(1)
 
 
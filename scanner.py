@@ -1,9 +1,16 @@
 """
 主扫描器模块 - 密钥泄露监控
 """
+import atexit
+import logging
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
 from typing import List, Dict, Optional, Union
+from config import LOG_LEVEL
 from github_scanner import GitHubScanner
 from html_report_generator import HTMLReportGenerator
 from leakage_monitor import LeakageMonitor
@@ -12,6 +19,41 @@ from dingtalk_notifier import DingTalkNotifier
 from whitelist_manager import WhitelistManager
 
 
+logger = logging.getLogger(__name__)
+
+
+def setup_logging() -> Optional[QueueListener]:
+    """
+    配置日志输出（所有模块的控制台输出都经过日志）
+    
+    扫描线程只把日志记录放入队列，由后台线程统一写入 stdout，
+    避免在搜索和结果处理过程中同步等待终端输出。
+    根日志器已有处理器时（调用方自行配置过日志）不做任何修改
+    
+    Returns:
+        后台日志线程（进程退出时自动停止并输出剩余日志）；未配置时返回 None
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    log_queue = Queue(-1)
+    listener = QueueListener(log_queue, handler)
+    
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    # requests/PyGithub 等第三方库的日志只保留警告以上
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    logging.getLogger('github').setLevel(logging.WARNING)
+    
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
 class CloudScanner:
     """密钥泄露监控扫描器"""
     
@@ -24,6 +66,9 @@ class CloudScanner:
             skip_scanned: 已弃用，保留以兼容旧代码
             timeout_minutes: 扫描超时时间（分钟），默认50分钟
         """
+        # 作为库使用且调用方未配置日志时，保证扫描进度仍输出到控制台
+        setup_logging()
+        
         # 支持单token或多token
         if isinstance(github_token, str):
             tokens = [github_token]
@@ -33,7 +78,7 @@ class CloudScanner:
         # 初始化Token管理器（如果有多个token）
         if len(tokens) > 1:
             self.token_manager = GitHubTokenManager(tokens)
-            print(f"✅ 使用多Token轮询模式（{len(tokens)}个Token）")
+            logger.info("✅ 使用多Token轮询模式（%s个Token）", len(tokens))
             current_token = self.token_manager.get_current_token()
         else:
             self.token_manager = None
@@ -58,31 +103,35 @@ class CloudScanner:
         Returns:
             报告文件路径
         """
-        print(f"🔒 密钥泄露监控模式")
-        print(f"=" * 60)
+        logger.info("🔒 密钥泄露监控模式")
+        logger.info("=" * 60)
         
         # 显示搜索类型
         if search_types:
             type_names = {'code': 'Code', 'commits': 'Commits', 'issues': 'Issues', 'pr': 'Pull Requests'}
             search_display = ', '.join([type_names.get(t, t) for t in search_types])
-            print(f"🔍 搜索范围: {search_display}")
+            logger.info("🔍 搜索范围: %s", search_display)
         
-        # 显示 API 速率限制状态
-        self.github_scanner.display_rate_limit()
-        print()
+        # 创建监控器
+        monitor = LeakageMonitor(
+            self.github_scanner, 
+            search_types=search_types,
+            token_manager=self.token_manager,  # 传递token管理器
+            dingtalk_notifier=self.dingtalk_notifier,  # 传递钉钉通知器
+            whitelist_manager=self.whitelist_manager  # 传递白名单管理器
+        )
+        
+        # 在后台解析密钥清单，同时查询并显示 API 速率限制状态（两者互不依赖）
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            loading = executor.submit(monitor.secrets_loader.load_from_file, secrets_file)
+            self.github_scanner.display_rate_limit()
+            logger.info("")
         
         scan_start_time = datetime.now()
         
         try:
-            # 创建监控器并加载密钥清单
-            monitor = LeakageMonitor(
-                self.github_scanner, 
-                secrets_file, 
-                search_types=search_types,
-                token_manager=self.token_manager,  # 传递token管理器
-                dingtalk_notifier=self.dingtalk_notifier,  # 传递钉钉通知器
-                whitelist_manager=self.whitelist_manager  # 传递白名单管理器
-            )
+            # 加载密钥清单（解析失败时在此抛出异常）
+            monitor.load_secrets(secrets_file, loading)
             
             # 扫描所有密钥
             leakages = monitor.scan_all_secrets()
@@ -91,14 +140,14 @@ class CloudScanner:
             if self.whitelist_manager.enabled:
                 filtered_leakages, filtered_count = self.whitelist_manager.filter_leakages(leakages)
                 if filtered_count > 0:
-                    print(f"\n🔒 白名单过滤: 已过滤 {filtered_count} 处泄露")
+                    logger.info("\n🔒 白名单过滤: 已过滤 %s 处泄露", filtered_count)
                 leakages = filtered_leakages
             
             # 打印摘要
             monitor.print_summary(leakages)
             
             # 生成报告
-            print(f"\n📝 生成报告...")
+            logger.info("\n📝 生成报告...")
             report_path = self.report_generator.generate_monitor_report(
                 leakages,
                 monitor.get_statistics(leakages),
@@ -112,22 +161,18 @@ class CloudScanner:
                 len(leakages),
                 monitor.get_statistics(leakages)
             )
-            print(summary)
+            logger.info(summary)
             
             # 显示最终 API 使用情况
-            print()
+            logger.info("")
             self.github_scanner.display_rate_limit()
             
             return report_path
             
+        # 只为缺少清单文件给出提示；其他异常直接抛出，由调用方记录（scan_github 使用 logger.exception 输出堆栈）
         except FileNotFoundError as e:
-            print(f"\n❌ 错误: {e}")
-            print(f"\n💡 提示:")
-            print(f"   1. 确保密钥清单文件存在")
-            print(f"   2. 可以复制 secrets_to_monitor.example.txt 为起点")
-            raise
-        except Exception as e:
-            print(f"\n❌ 扫描过程中发生错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("\n❌ 错误: %s", e)
+            logger.info("\n💡 提示:")
+            logger.info("   1. 确保密钥清单文件存在")
+            logger.info("   2. 可以复制 secrets_to_monitor.example.txt 为起点")
             raise
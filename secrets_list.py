@@ -2,14 +2,27 @@
 密钥清单管理模块
 用于加载和解析用户提供的密钥清单文件
 """
+import logging
 import os
-from typing import List, Dict, Optional
+import re
+import sys
+from collections import Counter
+from typing import FrozenSet, Iterator, List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 隐藏密钥中间部分时使用的占位符
+_MASK = "******"
 
 
 class SecretItem:
     """密钥项数据类"""
     
-    def __init__(self, secret_type: str, secret_value: str, note: str = ""):
+    # 清单可能包含上万个密钥，不为每个实例创建 __dict__
+    __slots__ = ('secret_type', 'secret_value', 'note', 'exclude_pattern', 'masked', 'display_name',
+                 '_exclude_re')
+    
+    def __init__(self, secret_type: str, secret_value: str, note: str = "", exclude_pattern: str = ""):
         """
         初始化密钥项
         
@@ -17,10 +30,24 @@ class SecretItem:
             secret_type: 密钥类型
             secret_value: 密钥值
             note: 备注信息
+            exclude_pattern: 要忽略的文件路径正则（可选，如 node_modules/|vendor/）
+            
+        Raises:
+            ValueError: 排除规则不是有效的正则表达式
         """
         self.secret_type = secret_type
         self.secret_value = secret_value
         self.note = note
+        self.exclude_pattern = exclude_pattern
+        try:
+            self._exclude_re = re.compile(exclude_pattern) if exclude_pattern else None
+        except re.error as e:
+            raise ValueError(f"排除规则不是有效的正则表达式: {e}")
+        # 隐藏后的密钥值在打印、告警和报告中多次使用，只计算一次
+        # （直接拼接，不经过 mask_value 的参数计算；前后各显示6个字符，太短时只显示开头）
+        head = secret_value[:6]
+        self.masked = head + _MASK if len(secret_value) <= 12 else head + _MASK + secret_value[-6:]
+        self.display_name = SECRET_TYPE_NAMES.get(secret_type, secret_type)
     
     def mask_value(self, mask_length: int = 6) -> str:
         """
@@ -35,8 +62,20 @@ class SecretItem:
         value = self.secret_value
         if len(value) <= mask_length * 2:
             # 如果密钥太短，只显示开头
-            return value[:mask_length] + "******"
-        return value[:mask_length] + "******" + value[-mask_length:]
+            return value[:mask_length] + _MASK
+        return value[:mask_length] + _MASK + value[-mask_length:]
+    
+    def is_path_excluded(self, path: str) -> bool:
+        """
+        文件路径是否匹配该密钥的排除规则
+        
+        Args:
+            path: 泄露所在的文件路径
+            
+        Returns:
+            True: 应该忽略此处泄露
+        """
+        return self._exclude_re is not None and self._exclude_re.search(path) is not None
     
     def to_dict(self) -> Dict:
         """转换为字典"""
@@ -44,18 +83,18 @@ class SecretItem:
             'type': self.secret_type,
             'value': self.secret_value,
             'note': self.note,
-            'masked_value': self.mask_value()
+            'masked_value': self.masked
         }
     
     def __repr__(self):
-        return f"SecretItem(type={self.secret_type}, value={self.mask_value()}, note={self.note})"
+        return f"SecretItem(type={self.secret_type}, value={self.masked}, note={self.note})"
 
 
 class SecretsListLoader:
     """密钥清单加载器"""
     
-    # 支持的密钥类型
-    SUPPORTED_TYPES = [
+    # 支持的密钥类型（frozenset，逐行校验时 O(1) 判断成员）
+    SUPPORTED_TYPES: FrozenSet[str] = frozenset({
         'aliyun_ak', 'aliyun_sk',           # 阿里云
         'huaweicloud_ak', 'huaweicloud_sk', # 华为云
         'authing_app',                       # Authing应用ID
@@ -70,12 +109,14 @@ class SecretsListLoader:
         'private_key',                       # 私钥
         'certificate',                       # 证书
         'custom'                             # 自定义类型
-    ]
+    })
     
     def __init__(self):
         """初始化加载器"""
         self.secrets: List[SecretItem] = []
         self.errors: List[str] = []
+        # 解析时累计的各类型数量，统计时不需要再遍历密钥列表
+        self.type_counts: Counter = Counter()
     
     def load_from_file(self, file_path: str) -> List[SecretItem]:
         """
@@ -91,19 +132,42 @@ class SecretsListLoader:
             FileNotFoundError: 文件不存在
             ValueError: 文件格式错误
         """
+        self.secrets = []  # 加载失败时不保留上次的结果
+        self.secrets = list(self.iter_from_file(file_path))
+        return self.secrets
+    
+    def iter_from_file(self, file_path: str) -> Iterator[SecretItem]:
+        """
+        逐行解析密钥清单文件，边读边返回密钥项
+        
+        不需要等整个文件解析完成即可开始扫描，也不会在内存中保留全部密钥
+        
+        Args:
+            file_path: 清单文件路径
+            
+        Returns:
+            密钥项迭代器（文件中没有有效密钥时，迭代结束时抛出 ValueError）
+            
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(
                 f"密钥清单文件不存在: {file_path}\n"
                 f"   提示: 可以复制 secrets_to_monitor.example.txt 为起点"
             )
         
-        self.secrets = []
         self.errors = []
-        total_lines = 0
+        self.type_counts = Counter()
+        return self._iter_lines(file_path)
+    
+    def _iter_lines(self, file_path: str) -> Iterator[SecretItem]:
+        """按行解析文件并返回密钥项（由 iter_from_file 调用）"""
+        line_num = 0
         
-        with open(file_path, 'r', encoding='utf-8') as f:
+        # 使用 1MB 读缓冲减少大文件的读取次数；仍然逐行解析，不把整个文件读入内存
+        with open(file_path, 'r', encoding='utf-8', buffering=1 << 20) as f:
             for line_num, line in enumerate(f, 1):
-                total_lines += 1
                 line = line.strip()
                 
                 # 跳过空行和注释
@@ -113,33 +177,36 @@ class SecretsListLoader:
                 # 解析行
                 try:
                     secret_item = self._parse_line(line, line_num)
-                    if secret_item:
-                        self.secrets.append(secret_item)
                 except ValueError as e:
                     error_msg = f"第 {line_num} 行: {e}"
                     self.errors.append(error_msg)
-                    print(f"⚠️  {error_msg}")
+                    logger.warning("⚠️  %s", error_msg)
+                    continue
+                
+                if secret_item:
+                    self.type_counts[secret_item.secret_type] += 1
+                    yield secret_item
         
-        if not self.secrets and not self.errors:
+        total_lines = line_num
+        loaded_count = sum(self.type_counts.values())
+        if not loaded_count and not self.errors:
             raise ValueError(
                 f"密钥清单文件为空或没有有效的密钥: {file_path}\n"
                 f"   文件共 {total_lines} 行，但没有找到有效的密钥配置\n"
                 f"   请检查文件格式是否正确（格式: 密钥类型|密钥值|备注）"
             )
         
-        if not self.secrets and self.errors:
+        if not loaded_count and self.errors:
             raise ValueError(
                 f"密钥清单文件包含 {len(self.errors)} 个错误，没有成功加载任何密钥\n"
                 f"   请修复上述错误后重试"
             )
-        
-        return self.secrets
     
     def _parse_line(self, line: str, line_num: int) -> Optional[SecretItem]:
         """
         解析单行数据
         
-        格式: 密钥类型|密钥值|备注(可选)
+        格式: 密钥类型|密钥值|备注(可选)|排除路径正则(可选)
         
         Args:
             line: 行内容
@@ -151,18 +218,21 @@ class SecretsListLoader:
         Raises:
             ValueError: 格式错误
         """
-        parts = line.split('|')
+        # 最多拆分为4个字段，排除规则（正则）中可以包含 |
+        parts = line.split('|', 3)
         
         if len(parts) < 2:
             raise ValueError(f"格式错误，需要至少2个字段（密钥类型|密钥值），当前只有 {len(parts)} 个字段")
         
-        secret_type = parts[0].strip()
+        # 类型字符串只有十几种，驻留后所有密钥项共用同一个字符串对象
+        secret_type = sys.intern(parts[0].strip())
         secret_value = parts[1].strip()
         note = parts[2].strip() if len(parts) > 2 else ""
+        exclude_pattern = parts[3].strip() if len(parts) > 3 else ""
         
         # 验证密钥类型
         if secret_type not in self.SUPPORTED_TYPES:
-            print(f"⚠️  第 {line_num} 行: 未知的密钥类型 '{secret_type}'，将作为 'custom' 类型处理")
+            logger.warning("⚠️  第 %d 行: 未知的密钥类型 '%s'，将作为 'custom' 类型处理", line_num, secret_type)
             # 不抛出错误，而是将其视为自定义类型
         
         # 验证密钥值
@@ -172,7 +242,7 @@ class SecretsListLoader:
         if len(secret_value) < 4:
             raise ValueError(f"密钥值太短（至少4个字符），当前长度: {len(secret_value)}")
         
-        return SecretItem(secret_type, secret_value, note)
+        return SecretItem(secret_type, secret_value, note, exclude_pattern)
     
     def get_secrets_by_type(self, secret_type: str) -> List[SecretItem]:
         """
@@ -197,13 +267,9 @@ class SecretsListLoader:
         Returns:
             统计信息字典
         """
-        type_counts = {}
-        for secret in self.secrets:
-            type_counts[secret.secret_type] = type_counts.get(secret.secret_type, 0) + 1
-        
         return {
-            'total_count': len(self.secrets),
-            'type_counts': type_counts,
+            'total_count': sum(self.type_counts.values()),
+            'type_counts': dict(self.type_counts),
             'error_count': len(self.errors)
         }
     
@@ -226,14 +292,14 @@ class SecretsListLoader:
     def print_summary(self):
         """打印加载摘要"""
         stats = self.get_statistics()
-        print(f"\n📋 密钥清单加载摘要:")
-        print(f"   总数量: {stats['total_count']}")
-        print(f"   错误数: {stats['error_count']}")
+        logger.info("\n📋 密钥清单加载摘要:")
+        logger.info("   总数量: %d", stats['total_count'])
+        logger.info("   错误数: %d", stats['error_count'])
         
         if stats['type_counts']:
-            print(f"\n   按类型统计:")
+            logger.info("\n   按类型统计:")
             for secret_type, count in sorted(stats['type_counts'].items()):
-                print(f"     - {secret_type}: {count}")
+                logger.info("     - %s: %d", secret_type, count)
 
 
 # 类型名称映射（用于报告显示）
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+白名单规则匹配测试
+
+运行: python -m unittest test_whitelist_manager
+"""
+import json
+import os
+import tempfile
+import unittest
+from pathlib import PurePosixPath
+
+from whitelist_manager import WhitelistManager
+
+
+PATHS = [
+    'README.md', 'docs/x.md', 'a/b/c.md', 'demo.py', 'a/demo.py', 'src/demo.py',
+    'a', 'x', 'a/b', 'a/c', 'a/x', 'x/a', 'x/a/b', 'a/x/b', 'ac', 'abc', 'axc', 'bcd',
+    'a/c/d', 'mycompany/test-repo', 'mycompany/test', 'other/test-repo',
+    'src/q/z.py', 'q/src/q/z.py', 'src/z.py', 'xzy', 'x/y', 'x.y',
+    '/etc/passwd', 'etc/passwd', '/etc/a/b',
+]
+
+
+def match(patterns, path):
+    """按 WhitelistManager 的预处理和匹配流程判断路径是否命中规则"""
+    literals, lengths, globs = WhitelistManager._split_patterns(patterns)
+    return WhitelistManager._match_path(path, literals, lengths, globs)
+
+
+class TranslateGlobTest(unittest.TestCase):
+    """不含 ** 的规则与 PurePath.match 结果一致"""
+
+    def assert_same_as_purepath(self, pattern):
+        for path in PATHS:
+            with self.subTest(pattern=pattern, path=path):
+                self.assertEqual(match([pattern], path), PurePosixPath(path).match(pattern))
+
+    def test_literal(self):
+        for pattern in ('demo.py', 'a/b', 'mycompany/test-repo', 'x', 'a/c/d'):
+            self.assert_same_as_purepath(pattern)
+
+    def test_star(self):
+        for pattern in ('*.md', '*demo*', 'a/*', '*/b', 'mycompany/test-*', '*', '*/*'):
+            self.assert_same_as_purepath(pattern)
+
+    def test_question_mark(self):
+        for pattern in ('x?y', 'a?c', '?', 'a/?'):
+            self.assert_same_as_purepath(pattern)
+
+    def test_character_class(self):
+        for pattern in ('[ab]*', 'a[!b]c', 'a/[!b]', '[!a]*', 'x[.]y'):
+            self.assert_same_as_purepath(pattern)
+
+    def test_absolute(self):
+        for pattern in ('/etc/*', '/etc/passwd', '/etc/*/b', '/a'):
+            self.assert_same_as_purepath(pattern)
+
+    def test_multiple_patterns(self):
+        patterns = ['demo.py', '*.md', 'a[!b]c', '/etc/*', 'src/*/z.py']
+        for path in PATHS:
+            with self.subTest(path=path):
+                expected = any(PurePosixPath(path).match(p) for p in patterns)
+                self.assertEqual(match(patterns, path), expected)
+
+
+class RecursiveGlobTest(unittest.TestCase):
+    """单独的 ** 匹配任意层级目录"""
+
+    def test_trailing_requires_one_segment(self):
+        for path in ('x', 'a/x', 'docs/x', 'src/config'):
+            with self.subTest(path=path):
+                self.assertFalse(match(['x/**', 'config/**'], path))
+        for path in ('x/a', 'x/a/b', 'src/x/a', 'config/settings.py'):
+            with self.subTest(path=path):
+                self.assertTrue(match(['x/**', 'config/**'], path))
+
+    def test_middle(self):
+        for path in ('test/a.py', 'test/x/y/a.py', 'src/test/a.py'):
+            with self.subTest(path=path):
+                self.assertTrue(match(['test/**/*'], path))
+        for path in ('test', 'mytest/a.py', 'a.py'):
+            with self.subTest(path=path):
+                self.assertFalse(match(['test/**/*'], path))
+
+    def test_leading(self):
+        for path in ('README.md', 'a/b/c.md'):
+            with self.subTest(path=path):
+                self.assertTrue(match(['**/*.md'], path))
+        self.assertFalse(match(['**/*.md'], 'a/b.py'))
+
+    def test_star_does_not_cross_directories(self):
+        self.assertFalse(match(['a*c'], 'a/c'))
+        self.assertFalse(match(['a[!b]c'], 'a/c'))
+        self.assertFalse(match(['a?c'], 'a/c'))
+
+
+class FilterLeakagesTest(unittest.TestCase):
+    """批量过滤泄露记录"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'whitelist.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'repositories': ['mycompany/test-*'], 'files': ['*.md']}, f)
+        self.manager = WhitelistManager(path)
+
+    def test_record_missing_fields(self):
+        leakages = [
+            {'repo_name': 'mycompany/test-a', 'file_path': 'src/a.py'},
+            {'repo_name': 'other/repo', 'file_path': 'src/a.py'},
+            {'file_path': 'README.md'},
+            {'repo_name': 'other/repo'},
+            {'repo_name': 'mycompany/test-b'},
+            {},
+        ]
+        filtered, count = self.manager.filter_leakages(leakages)
+        self.assertEqual(filtered, [leakages[1], leakages[3], leakages[5]])
+        self.assertEqual(count, 3)
+        for leakage in leakages:
+            with self.subTest(leakage=leakage):
+                self.assertEqual(leakage in filtered, not self.manager.is_leakage_whitelisted(leakage))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,263 @@
 """
 白名单管理模块 - SecretGuard 密钥泄露监控系统
 """
+import fnmatch
+import json
+import logging
 import os
+import re
+import threading
 import yaml
+from collections import OrderedDict
+from operator import itemgetter
 from pathlib import PurePath
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Pattern, Tuple
+
+# 优先使用 libyaml 的 C 解析器，未编译 libyaml 时回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+logger = logging.getLogger(__name__)
+
+# 一次取出泄露记录中参与白名单判断的字段
+_LEAKAGE_FIELDS = itemgetter('repo_name', 'file_path')
+
+
+def _leakage_fields(leakage: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """取出 (repo_name, file_path)，缺少字段的记录单独回退到 get"""
+    try:
+        return _LEAKAGE_FIELDS(leakage)
+    except KeyError:
+        return leakage.get('repo_name'), leakage.get('file_path')
+
+# 已解析的白名单配置缓存: 绝对路径 -> (mtime_ns, size, config)
+_CONFIG_CACHE = OrderedDict()
+_CONFIG_CACHE_SIZE = 32
+
+# 解析结果的 JSON 缓存文件后缀（与配置文件同目录，配置文件修改后自动失效）
+_SIDECAR_SUFFIX = '.cache.json'
+
+# 每类匹配结果缓存的最大条目数（超出后清空重建）
+_MATCH_CACHE_SIZE = 4096
+
+# 通配符规则每匹配多少次按命中次数重排一次
+_REORDER_INTERVAL = 1024
+
+# 匹配零个或多个路径段（规则中单独的 **）
+_ANY_SEGMENTS = r'(?:\n[^\n]*)*'
+# 匹配一个或多个路径段（规则末尾单独的 **）
+_SOME_SEGMENTS = r'(?:\n[^\n]*)+'
+
+
+def _read_config(path: str):
+    """
+    读取并解析白名单配置文件，文件未修改（mtime 和大小不变）时直接返回缓存结果
+    
+    .json 和 .txt 文件直接解析，其余文件按 YAML 解析（并使用 JSON 缓存）
+    
+    Args:
+        path: 配置文件路径
+        
+    Returns:
+        解析后的配置（调用方不应修改）
+    """
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    cached = _CONFIG_CACHE.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        _CONFIG_CACHE.move_to_end(key)
+        return cached[2]
+    
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    elif ext == '.txt':
+        with open(path, 'r', encoding='utf-8') as f:
+            config = _parse_txt_config(f.read())
+    else:
+        config = _load_sidecar(path, st)
+        if config is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = yaml.load(f.read(), Loader=SafeLoader)
+            _save_sidecar(path, st, config)
+    
+    _CONFIG_CACHE[key] = (st.st_mtime_ns, st.st_size, config)
+    _CONFIG_CACHE.move_to_end(key)
+    if len(_CONFIG_CACHE) > _CONFIG_CACHE_SIZE:
+        _CONFIG_CACHE.popitem(last=False)
+    return config
+
+
+def _parse_txt_config(text: str) -> Dict[str, List[str]]:
+    """
+    解析纯文本格式的白名单（每行一条规则，用 "# repo:" / "# file:" 分节）
+    
+    Args:
+        text: 文件内容
+        
+    Returns:
+        与 YAML 格式相同结构的配置
+    """
+    config = {'repositories': [], 'files': []}
+    section = None
+    for line_num, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            header = line[1:].strip().lower()
+            if header in ('repo:', 'repositories:'):
+                section = 'repositories'
+            elif header in ('file:', 'files:'):
+                section = 'files'
+            continue
+        if section is None:
+            logger.warning("⚠️  第 %d 行不在 # repo: 或 # file: 分节内，已忽略: %s", line_num, line)
+            continue
+        config[section].append(line)
+    return config
+
+
+def _load_sidecar(path: str, st: os.stat_result):
+    """
+    读取配置文件旁的 JSON 缓存（json 由 C 扩展解析，比 YAML 快得多）
+    
+    Args:
+        path: 配置文件路径
+        st: 配置文件的 stat 结果
+        
+    Returns:
+        缓存的配置；缓存不存在、已过期或损坏时返回 None
+    """
+    try:
+        with open(path + _SIDECAR_SUFFIX, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['mtime_ns'] == st.st_mtime_ns and cached['size'] == st.st_size:
+            return cached['config']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _save_sidecar(path: str, st: os.stat_result, config):
+    """
+    写入配置文件旁的 JSON 缓存，写入失败（目录只读、含 JSON 不支持的类型等）时忽略
+    
+    Args:
+        path: 配置文件路径
+        st: 配置文件的 stat 结果
+        config: 解析后的配置
+    """
+    if config is None:
+        return
+    try:
+        data = json.dumps({'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'config': config},
+                          ensure_ascii=False)
+        with open(path + _SIDECAR_SUFFIX, 'w', encoding='utf-8') as f:
+            f.write(data)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def _translate_glob(pattern: str) -> str:
+    """
+    将通配符规则转换为正则表达式片段
+    
+    路径按段拼接为 "\\n段1\\n段2..." 的形式匹配：相对规则从路径末尾开始匹配
+    （与 PurePath.match 一致），单独的 ** 匹配任意层级目录，位于末尾时至少匹配一层
+    
+    Args:
+        pattern: 通配符规则
+        
+    Returns:
+        正则表达式片段
+    """
+    path = PurePath(pattern)
+    parts = path.parts
+    regex = '' if path.anchor else _ANY_SEGMENTS + '?'
+    for index, part in enumerate(parts):
+        if part == '**':
+            # 末尾的 ** 至少匹配一段，否则 "config/**" 会匹配到名为 config 的文件本身
+            regex += _SOME_SEGMENTS if index == len(parts) - 1 else _ANY_SEGMENTS
+            continue
+        # 去掉 fnmatch.translate 的 (?s:...)\Z 外壳，使 . 不匹配换行符（即不跨越目录）
+        segment = fnmatch.translate(part)[len('(?s:'):-len(r')\Z')]
+        regex += '\n' + segment.replace('[^', '[^\n')
+    return regex
+
+
+def _path_parts(path: str) -> Tuple[str, ...]:
+    """
+    将仓库名或文件路径拆分为路径段
+    
+    Args:
+        path: 仓库全名或文件路径
+        
+    Returns:
+        路径段元组
+    """
+    if path.startswith('/'):
+        return PurePath(path).parts
+    return tuple(part for part in path.split('/') if part and part != '.')
+
+
+class _GlobMatcher:
+    """通配符规则合并后的正则，按命中次数定期调整规则顺序（命中多的规则先尝试）"""
+    
+    def __init__(self, regexes: List[str]):
+        """
+        初始化
+        
+        Args:
+            regexes: 各条规则转换后的正则表达式片段
+        """
+        # 多个扫描线程并发匹配：(规则顺序, 命中次数, 合并正则) 作为一个整体替换，
+        # 命中计数和重排在锁内进行
+        self._lock = threading.Lock()
+        self._state = self._build(list(regexes), [0] * len(regexes))
+        self._calls = 0
+    
+    @staticmethod
+    def _build(regexes: List[str], hits: List[int]) -> Tuple[List[str], List[int], Pattern]:
+        """按给定顺序编译合并正则，每条规则放入命名分组以便统计命中"""
+        compiled = re.compile('(?:' + '|'.join(
+            f'(?P<_g{i}>{regex})' for i, regex in enumerate(regexes)) + r')\Z')
+        return regexes, hits, compiled
+    
+    def match(self, path: str) -> bool:
+        """
+        匹配换行符拼接的路径段
+        
+        Args:
+            path: "\\n段1\\n段2..." 形式的路径
+            
+        Returns:
+            是否匹配任一规则
+        """
+        state = self._state
+        m = state[2].match(path)
+        
+        with self._lock:
+            if m is not None and state is self._state:
+                # 匹配期间规则已被重排时不计数，避免记到错误的规则上
+                state[1][int(m.lastgroup[2:])] += 1
+            self._calls += 1
+            if self._calls >= _REORDER_INTERVAL:
+                self._calls = 0
+                self._reorder()
+        return m is not None
+    
+    def _reorder(self):
+        """按命中次数从高到低重排规则，顺序不变时不重新编译（调用者需持有锁）"""
+        regexes, hits, _ = self._state
+        order = sorted(range(len(hits)), key=lambda i: -hits[i])
+        if order == sorted(order):
+            return
+        self._state = self._build([regexes[i] for i in order], [hits[i] for i in order])
 
 
 class WhitelistManager:
@@ -15,49 +268,141 @@ class WhitelistManager:
         初始化白名单管理器
         
         Args:
-            whitelist_file: 白名单配置文件路径
+            whitelist_file: 白名单配置文件路径（按扩展名识别 .json / .txt，其余按 YAML 解析）
         """
         self.whitelist_file = whitelist_file
-        self.repo_patterns = []
-        self.file_patterns = []
+        # 规则只在加载时确定，之后保持不可变
+        self.repo_patterns = ()
+        self.file_patterns = ()
         self.enabled = False
         
         self._load_whitelist()
+        self.prepare()
     
     def _load_whitelist(self):
         """加载白名单配置"""
-        if not os.path.exists(self.whitelist_file):
-            print(f"ℹ️  未找到白名单配置文件: {self.whitelist_file}")
-            return
-        
         try:
-            with open(self.whitelist_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = _read_config(self.whitelist_file)
             
             if not config:
-                print(f"⚠️  白名单配置文件为空")
+                logger.warning("⚠️  白名单配置文件为空")
                 return
             
             # 加载仓库白名单
-            self.repo_patterns = config.get('repositories', []) or []
+            self.repo_patterns = self._valid_patterns(config.get('repositories', []) or [], '仓库')
             
             # 加载文件白名单
-            self.file_patterns = config.get('files', []) or []
+            self.file_patterns = self._valid_patterns(config.get('files', []) or [], '文件')
             
             if self.repo_patterns or self.file_patterns:
                 self.enabled = True
-                print(f"✅ 白名单已加载:")
+                logger.info("✅ 白名单已加载:")
                 if self.repo_patterns:
-                    print(f"   - 仓库规则: {len(self.repo_patterns)} 条")
+                    logger.info("   - 仓库规则: %d 条", len(self.repo_patterns))
                 if self.file_patterns:
-                    print(f"   - 文件规则: {len(self.file_patterns)} 条")
+                    logger.info("   - 文件规则: %d 条", len(self.file_patterns))
             else:
-                print(f"ℹ️  白名单配置为空")
+                logger.info("ℹ️  白名单配置为空")
                 
-        except yaml.YAMLError as e:
-            print(f"❌ 白名单配置文件格式错误: {e}")
+        except FileNotFoundError:
+            logger.info("ℹ️  未找到白名单配置文件: %s", self.whitelist_file)
+        except (yaml.YAMLError, ValueError) as e:
+            logger.error("❌ 白名单配置文件格式错误: %s", e)
         except Exception as e:
-            print(f"❌ 加载白名单失败: {e}")
+            logger.error("❌ 加载白名单失败: %s", e)
+    
+    @staticmethod
+    def _valid_patterns(patterns: Iterable, kind: str) -> Tuple[str, ...]:
+        """
+        校验白名单规则，丢弃无效规则并给出提示（只在加载时执行一次）
+        
+        Args:
+            patterns: 配置文件中的规则列表
+            kind: 规则类型名称（用于提示）
+            
+        Returns:
+            有效规则元组
+        """
+        valid = []
+        for pattern in patterns:
+            try:
+                if not isinstance(pattern, str) or not PurePath(pattern).parts:
+                    raise ValueError("规则必须是非空字符串")
+                re.compile(_translate_glob(pattern))
+            except (ValueError, re.error) as e:
+                logger.warning("⚠️  忽略无效的%s白名单规则 %r: %s", kind, pattern, e)
+                continue
+            valid.append(pattern)
+        return tuple(valid)
+    
+    def prepare(self):
+        """
+        预处理白名单规则（加载后调用一次）
+        
+        不含通配符的规则按路径段放入 frozenset，匹配时只需查找路径末尾几段；
+        含通配符的规则预先编译为一个正则，匹配时只需调用一次
+        """
+        self._literal_repos, self._literal_repo_lengths, self._glob_repos = \
+            self._split_patterns(self.repo_patterns)
+        self._literal_files, self._literal_file_lengths, self._glob_files = \
+            self._split_patterns(self.file_patterns)
+        self._repo_enabled = bool(self.repo_patterns)
+        self._file_enabled = bool(self.file_patterns)
+        # 同一仓库/文件通常会出现多次泄露，缓存匹配结果（规则变化后需重新调用 prepare）
+        self._repo_cache = {}
+        self._file_cache = {}
+    
+    @staticmethod
+    def _split_patterns(patterns: Iterable) -> Tuple[frozenset, Tuple[int, ...], Optional[_GlobMatcher]]:
+        """
+        将规则分为普通字符串和通配符两类
+        
+        Args:
+            patterns: 白名单规则列表（已校验）
+            
+        Returns:
+            (普通规则的路径段集合, 普通规则的段数列表, 通配符规则匹配器)
+        """
+        literals = set()
+        globs = []
+        for pattern in patterns:
+            # 通配符和绝对路径规则编译为正则
+            if any(c in pattern for c in '*?[') or PurePath(pattern).anchor:
+                globs.append(_translate_glob(pattern))
+                continue
+            literals.add(PurePath(pattern).parts)
+        lengths = tuple(sorted({len(parts) for parts in literals}))
+        return frozenset(literals), lengths, (_GlobMatcher(globs) if globs else None)
+    
+    @staticmethod
+    def _match_path(path: str, literals: frozenset, lengths: Tuple[int, ...],
+                    globs: Optional[_GlobMatcher]) -> bool:
+        """
+        判断路径是否匹配白名单规则
+        
+        相对规则从路径末尾开始匹配，因此普通规则只需比较路径最后 n 段；
+        通配符规则中单独的 ** 匹配任意层级目录
+        
+        Args:
+            path: 仓库全名或文件路径
+            literals: 普通规则的路径段集合
+            lengths: 普通规则的段数列表
+            globs: 通配符规则匹配器
+            
+        Returns:
+            是否匹配
+        """
+        parts = _path_parts(path)
+        if literals:
+            for length in lengths:
+                if parts[-length:] in literals:
+                    return True
+        
+        if globs is not None:
+            # 每段前加换行符拼接，* 和 ? 不会跨越目录
+            return globs.match(''.join('\n' + part for part in parts))
+        
+        return False
     
     def is_repo_whitelisted(self, repo_name: str) -> bool:
         """
@@ -70,19 +415,7 @@ class WhitelistManager:
             True: 在白名单中（应该忽略）
             False: 不在白名单中
         """
-        if not self.enabled or not self.repo_patterns:
-            return False
-        
-        for pattern in self.repo_patterns:
-            # 使用 PurePath.match 支持 ** 递归匹配
-            try:
-                if PurePath(repo_name).match(pattern):
-                    return True
-            except:
-                # 如果模式无效，跳过
-                continue
-        
-        return False
+        return self.enabled and self._repo_enabled and self._match_repo(repo_name)
     
     def is_file_whitelisted(self, file_path: str) -> bool:
         """
@@ -95,19 +428,27 @@ class WhitelistManager:
             True: 在白名单中（应该忽略）
             False: 不在白名单中
         """
-        if not self.enabled or not self.file_patterns:
-            return False
-        
-        for pattern in self.file_patterns:
-            # 使用 PurePath.match 支持 ** 递归匹配
-            try:
-                if PurePath(file_path).match(pattern):
-                    return True
-            except:
-                # 如果模式无效，跳过
-                continue
-        
-        return False
+        return self.enabled and self._file_enabled and self._match_file(file_path)
+    
+    def _match_repo(self, repo_name: str) -> bool:
+        """匹配仓库规则（带缓存，不检查启用状态）"""
+        cached = self._repo_cache.get(repo_name)
+        if cached is None:
+            cached = self._match_path(repo_name, self._literal_repos, self._literal_repo_lengths, self._glob_repos)
+            if len(self._repo_cache) >= _MATCH_CACHE_SIZE:
+                self._repo_cache.clear()
+            self._repo_cache[repo_name] = cached
+        return cached
+    
+    def _match_file(self, file_path: str) -> bool:
+        """匹配文件规则（带缓存，不检查启用状态）"""
+        cached = self._file_cache.get(file_path)
+        if cached is None:
+            cached = self._match_path(file_path, self._literal_files, self._literal_file_lengths, self._glob_files)
+            if len(self._file_cache) >= _MATCH_CACHE_SIZE:
+                self._file_cache.clear()
+            self._file_cache[file_path] = cached
+        return cached
     
     def is_leakage_whitelisted(self, leakage: Dict) -> bool:
         """
@@ -123,19 +464,27 @@ class WhitelistManager:
         if not self.enabled:
             return False
         
-        # 检查仓库白名单
-        repo_name = leakage.get('repo_name', '')
-        if repo_name and self.is_repo_whitelisted(repo_name):
-            return True
+        # 检查仓库白名单（没有仓库规则时不取字段）
+        if self._repo_enabled:
+            repo_name = leakage.get('repo_name')
+            if repo_name and self._match_repo(repo_name):
+                return True
         
         # 检查文件白名单
-        file_path = leakage.get('file_path', '')
-        if file_path and self.is_file_whitelisted(file_path):
-            return True
+        if self._file_enabled:
+            file_path = leakage.get('file_path')
+            if file_path and self._match_file(file_path):
+                return True
         
         return False
     
-    def filter_leakages(self, leakages: List[Dict]) -> tuple[List[Dict], int]:
+    def _is_whitelisted(self, repo_name: str, file_path: str) -> bool:
+        """按仓库名和文件路径判断是否在白名单中（调用方需确认白名单已启用）"""
+        if repo_name and self._repo_enabled and self._match_repo(repo_name):
+            return True
+        return bool(file_path and self._file_enabled and self._match_file(file_path))
+    
+    def filter_leakages(self, leakages: List[Dict]) -> Tuple[List[Dict], int]:
         """
         过滤白名单中的泄露
         
@@ -148,16 +497,13 @@ class WhitelistManager:
         if not self.enabled or not leakages:
             return leakages, 0
         
-        filtered = []
-        filtered_count = 0
-        
-        for leakage in leakages:
-            if self.is_leakage_whitelisted(leakage):
-                filtered_count += 1
-            else:
-                filtered.append(leakage)
+        # 重复的仓库/文件命中匹配缓存，逐条判断只剩字典查找；
+        # 扫描结果都带 repo_name/file_path 字段，用 itemgetter 一次取出
+        is_whitelisted = self._is_whitelisted
+        filtered = [leakage for leakage, fields in zip(leakages, map(_leakage_fields, leakages))
+                    if not is_whitelisted(*fields)]
         
-        return filtered, filtered_count
+        return filtered, len(leakages) - len(filtered)
     
     def get_whitelist_summary(self) -> str:
         """